@@ -0,0 +1,90 @@
+"""
+Per-sentence cost of the kind classifier
+
+Compares the old behaviour of unpickling the model and the vectorizer for every
+sentence with the classifier that keeps them loaded, predicting one sentence at a time
+and whole batches with predict_many.
+"""
+import sys
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print(
+            "Usage: python -m benchmarks.classifier [sentences] [batch-size]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+import pickle
+import re
+import time
+
+from benchmarks import corpus
+from classification.predict_kind import (
+    MODEL_PATH,
+    VECTORIZER_PATH,
+    LazyLoadedClassifier,
+)
+
+
+def sentences_of(n_sentences: int) -> list[str]:
+    return [
+        sentence
+        for document in corpus.generate(n_sentences)
+        for sentence in re.split(r"(?<=\.) ", document)
+    ]
+
+
+def unpickling_run(sentences: list[str]) -> list[str]:
+    # like LazyLoadedClassifier.predict used to do
+    kinds = []
+    for sentence in sentences:
+        with open(MODEL_PATH, "rb") as model_file:
+            model = pickle.load(model_file)
+        with open(VECTORIZER_PATH, "rb") as vec_file:
+            vec = pickle.load(vec_file)
+        kinds.append(str(model.predict(vec.transform([sentence]))[0]))
+    return kinds
+
+
+def loaded_run(sentences: list[str]) -> list[str]:
+    classifier = LazyLoadedClassifier()
+    classifier.load()
+    return [classifier.predict(sentence) for sentence in sentences]
+
+
+def batched_run(sentences: list[str], batch_size: int) -> list[str]:
+    classifier = LazyLoadedClassifier()
+    classifier.load()
+    kinds = []
+    for start in range(0, len(sentences), batch_size):
+        kinds.extend(classifier.predict_many(sentences[start : start + batch_size]))
+    return kinds
+
+
+def timed(name: str, run, *args):
+    sentences = args[0]
+    start = time.perf_counter()
+    kinds = run(*args)
+    seconds = time.perf_counter() - start
+    print(
+        f"{name}: {len(sentences)} sentences",
+        f"{seconds * 1e6 / len(sentences):.1f} us/sentence",
+        f"{len(sentences) / seconds:.0f} sentences/sec",
+        sep="\t",
+    )
+    return kinds
+
+
+if __name__ == "__main__":
+    n_sentences = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    sentences = sentences_of(n_sentences)
+
+    # unpickling is slow, a few hundred sentences are enough
+    legacy = timed("unpickling", unpickling_run, sentences[:200])
+    loaded = timed("loaded", loaded_run, sentences)
+    batched = timed(f"predict_many x{batch_size}", batched_run, sentences, batch_size)
+
+    if legacy != loaded[: len(legacy)] or loaded != batched:
+        raise Exception("The classifiers do not agree")
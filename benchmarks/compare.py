@@ -0,0 +1,62 @@
+"""
+Compare two results of benchmarks/pipeline.py, e.g. before and after a commit
+"""
+import sys
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(
+            "Usage: python -m benchmarks.compare before.json after.json",
+            file=sys.stderr,
+        )
+        exit(1)
+
+import json
+
+
+def change(before: float, after: float) -> str:
+    if before == 0:
+        return "n/a"
+    return f"{after / before - 1:+.1%}"
+
+
+def compare(before: dict, after: dict) -> list[str]:
+    """
+    One line per metric found in both results
+    """
+    lines = [f"{before['commit']} -> {after['commit']}"]
+
+    for size, after_size in after["sizes"].items():
+        if size not in before["sizes"]:
+            continue
+        before_size = before["sizes"][size]
+
+        old = before_size["throughput"]["sentences/sec"]
+        new = after_size["throughput"]["sentences/sec"]
+        lines.append(
+            f"{size} sentences\tsentences/sec {old:.1f} -> {new:.1f} ({change(old, new)})"
+        )
+        old = before_size["peak rss MB"]
+        new = after_size["peak rss MB"]
+        lines.append(f"\tpeak rss MB {old:.1f} -> {new:.1f} ({change(old, new)})")
+
+        for name, after_stage in after_size["stages"].items():
+            if name not in before_size["stages"]:
+                continue
+            before_latency = before_size["stages"][name]["latency ms"]
+            for percentile in ["p50", "p99"]:
+                old = before_latency[percentile]
+                new = after_stage["latency ms"][percentile]
+                lines.append(
+                    f"\t{name} {percentile} ms {old:.3f} -> {new:.3f} ({change(old, new)})"
+                )
+
+    return lines
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as before_file, open(sys.argv[2]) as after_file:
+        before = json.load(before_file)
+        after = json.load(after_file)
+
+    print("\n".join(compare(before, after)))
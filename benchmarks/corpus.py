@@ -0,0 +1,173 @@
+"""
+Synthetic English specifications of a controlled size
+
+The sentences come from templates written for the extraction rules: copula class,
+expletive, "to have" attributes, named classes, multiplicities, passive and active
+voice, composition and "with". Some templates refer back with a pronoun so that coref
+has work to do. The same seed always gives the same corpus.
+"""
+import sys
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+    SEED = 0
+    if "--seed" in ARGS:
+        position = ARGS.index("--seed")
+        SEED = int(ARGS[position + 1])
+        del ARGS[position : position + 2]
+
+    if len(ARGS) != 2:
+        print(
+            "Usage: python -m benchmarks.corpus sentences out.jsonl [--seed n]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+import json
+import random
+import re
+
+# singular, plural
+NOUNS = [
+    ("school", "schools"),
+    ("department", "departments"),
+    ("student", "students"),
+    ("teacher", "teachers"),
+    ("course", "courses"),
+    ("library", "libraries"),
+    ("book", "books"),
+    ("member", "members"),
+    ("customer", "customers"),
+    ("order", "orders"),
+    ("item", "items"),
+    ("invoice", "invoices"),
+    ("account", "accounts"),
+    ("bank", "banks"),
+    ("employee", "employees"),
+    ("project", "projects"),
+    ("room", "rooms"),
+    ("building", "buildings"),
+    ("car", "cars"),
+    ("driver", "drivers"),
+]
+
+ATTRIBUTES = [
+    "name",
+    "address",
+    "date",
+    "price",
+    "title",
+    "number",
+    "description",
+    "status",
+    "email",
+    "capacity",
+]
+
+# third person, past participle
+VERBS = [
+    ("owns", "owned"),
+    ("manages", "managed"),
+    ("places", "placed"),
+    ("teaches", "taught"),
+    ("contains", "contained"),
+    ("uses", "used"),
+    ("creates", "created"),
+    ("supervises", "supervised"),
+]
+
+MULTIPLICITIES = ["one or more", "zero or more", "many", "several", "two"]
+
+# rule, template. Some templates are two sentences.
+TEMPLATES = [
+    ("copula class", "A {noun} is a class."),
+    ("copula class", "The {noun} is a class."),
+    ("expletive", "There is a {noun}."),
+    ("class named", "A class named {Noun}."),
+    ("to have", "A {noun} has a {attribute}."),
+    ("to have and clause", "A {noun} has a {attribute} and a {attribute2}."),
+    (
+        "to have and many clauses",
+        "A {noun} has a {attribute}, a {attribute2} and a {attribute3}.",
+    ),
+    ("to have multiplicity", "A {noun} has {multiplicity} {others}."),
+    ("passive voice", "The {noun} is {verbed} by a {other}."),
+    ("active voice", "A {noun} {verbs} a {other}."),
+    ("composed", "A {noun} is composed of {others}."),
+    ("noun with", "A {noun} with a {other}."),
+    ("coref", "A {noun} is a class. A {other} {verbs} it."),
+    ("coref", "There is a {noun}. The {other} {verbs} it."),
+]
+
+
+def fill(template: str, rng: random.Random) -> str:
+    (noun, _), (other, others) = rng.sample(NOUNS, 2)
+    attribute, attribute2, attribute3 = rng.sample(ATTRIBUTES, 3)
+    verbs, verbed = rng.choice(VERBS)
+    sentence = template.format(
+        noun=noun,
+        Noun=noun.capitalize(),
+        other=other,
+        others=others,
+        attribute=attribute,
+        attribute2=attribute2,
+        attribute3=attribute3,
+        verbs=verbs,
+        verbed=verbed,
+        multiplicity=rng.choice(MULTIPLICITIES),
+    )
+    # a account -> an account
+    return re.sub(r"\b([Aa]) (?=[aeiou])", r"\1n ", sentence)
+
+
+def sentence_count(template: str) -> int:
+    return template.count(".")
+
+
+def generate(
+    n_sentences: int, sentences_per_document: int = 10, seed: int = 0
+) -> list[str]:
+    """
+    Documents of about sentences_per_document sentences, n_sentences in total
+    """
+    rng = random.Random(seed)
+    documents = []
+    current = []
+    current_count = 0
+    total = 0
+
+    while total < n_sentences:
+        _, template = rng.choice(TEMPLATES)
+        count = sentence_count(template)
+        if total + count > n_sentences:
+            # only one-sentence templates fit at the end
+            continue
+
+        current.append(fill(template, rng))
+        current_count += count
+        total += count
+
+        if current_count >= sentences_per_document:
+            documents.append(" ".join(current))
+            current = []
+            current_count = 0
+
+    if len(current) > 0:
+        documents.append(" ".join(current))
+
+    return documents
+
+
+def save_records(documents: list[str], path: str):
+    """
+    Saves the documents as the {id, text} records read by translate.py --batch
+    """
+    with open(path, "w") as out:
+        for index, text in enumerate(documents):
+            print(json.dumps({"id": f"synthetic-{index}", "text": text}), file=out)
+
+
+if __name__ == "__main__":
+    documents = generate(int(ARGS[0]), seed=SEED)
+    save_records(documents, ARGS[1])
+    print(f"Saved {len(documents)} documents to {ARGS[1]}")
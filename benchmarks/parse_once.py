@@ -0,0 +1,86 @@
+"""
+Parser invocations and wall time of the extraction parse, with and without reusing
+the sentences already parsed by the coref pipeline
+
+Both runs start from the same coref docs, so only the parse done for extraction is
+compared.
+"""
+import sys
+import time
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print(
+            "Usage: python -m benchmarks.parse_once [records.jsonl|records.csv] [repeat]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+from extraction import pipelines
+from extraction.preprocess import (
+    resolve_coref_doc,
+    resolve_coref_sentences,
+    parse_sentences,
+)
+
+TEXTS = [
+    "A school has a name. It has one or more departments. A department is a class.",
+    "The library contains books and magazines. They are borrowed by members.",
+    "There is a course. The course is taught by a teacher. A student takes it.",
+    "A customer places an order. An order has at least one item.",
+]
+
+
+def parse_every_sentence(docs):
+    """
+    The old way: every resolved sentence is parsed again
+    """
+    nlp = pipelines.get("extraction")
+    parses = 0
+    for doc in docs:
+        for sentence in resolve_coref_doc(doc).values():
+            nlp(sentence)
+            parses += 1
+    return parses
+
+
+def reuse_spans(docs):
+    parses = 0
+    for doc in docs:
+        sentences = resolve_coref_sentences(doc)
+        parses += sum(1 for _, span in sentences.values() if span is None)
+        for _ in parse_sentences(sentences.values()):
+            pass
+    return parses
+
+
+def timed(function, docs):
+    start = time.perf_counter()
+    parses = function(docs)
+    return parses, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from translate import read_records
+
+        texts = [text for _, text in read_records(sys.argv[1])]
+    else:
+        texts = TEXTS
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+    docs = list(pipelines.get("coref").pipe(texts * repeat))
+    sentences = sum(len(list(doc.sents)) for doc in docs)
+    pipelines.get("extraction")
+
+    before, before_seconds = timed(parse_every_sentence, docs)
+    after, after_seconds = timed(reuse_spans, docs)
+
+    print(f"{len(docs)} texts, {sentences} sentences")
+    print(f"parse every sentence: {before} parses\t{before_seconds:.3f} s")
+    print(f"reuse coref spans:    {after} parses\t{after_seconds:.3f} s")
+    if before > 0 and before_seconds > 0:
+        print(
+            f"{1 - after / before:.0%} fewer parses, "
+            f"{1 - after_seconds / before_seconds:.0%} less time"
+        )
@@ -0,0 +1,188 @@
+"""
+End-to-end throughput of the translation pipeline on synthetic corpora
+
+For each corpus size, the documents are translated one at a time to get the latency of
+every stage, then all together with Translator.translate_many for the throughput. The
+models are loaded before timing and nothing is cached. Results are saved as JSON, see
+benchmarks/compare.py to compare two runs.
+"""
+import sys
+
+USAGE = "Usage: python -m benchmarks.pipeline out.json [--sizes 10,100,1000,10000] [--batch-size 64] [--seed 0]"
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+
+    def pop_option(flag: str, default):
+        if flag not in ARGS:
+            return default
+        position = ARGS.index(flag)
+        value = ARGS[position + 1]
+        del ARGS[position : position + 2]
+        return value
+
+    SIZES = [
+        int(size) for size in pop_option("--sizes", "10,100,1000,10000").split(",")
+    ]
+    BATCH_SIZE = int(pop_option("--batch-size", 64))
+    SEED = int(pop_option("--seed", 0))
+
+    if len(ARGS) != 1:
+        print(USAGE, file=sys.stderr)
+        exit(1)
+
+import datetime
+import json
+import platform
+import resource
+import subprocess
+import time
+from importlib import metadata
+
+from benchmarks import corpus
+from extraction import pipelines, trace
+from translate import Translator
+
+MEGABYTE = 2**20
+
+
+def percentiles(values: list[float]) -> dict:
+    """
+    Nearest-rank percentiles
+    """
+    if len(values) == 0:
+        return {}
+    ordered = sorted(values)
+
+    def rank(percent):
+        return ordered[min(len(ordered) - 1, int(percent / 100 * len(ordered)))]
+
+    return {
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "max": ordered[-1],
+    }
+
+
+def peak_memory() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def stage_latencies(translator: Translator, documents: list[str]) -> dict:
+    """
+    Translate the documents one at a time and time every stage
+    """
+    tracer = trace.enable(sample_memory=True)
+    try:
+        for document in documents:
+            translator.translate(document)
+    finally:
+        trace.disable()
+
+    durations: dict[str, list[float]] = {}
+    for name, start, end, _, _ in tracer.events:
+        durations.setdefault(name, []).append((end - start) / 1e6)
+
+    return {
+        name: {
+            "calls": len(stage_durations),
+            "total ms": sum(stage_durations),
+            "latency ms": percentiles(stage_durations),
+            "peak rss MB": tracer.peak_memory.get(name, 0) / MEGABYTE,
+        }
+        for name, stage_durations in durations.items()
+    }
+
+
+def throughput(translator: Translator, documents: list[str], batch_size: int) -> dict:
+    start = time.perf_counter()
+    sentences = 0
+    for _, sentence_count in translator.translate_many(
+        documents, batch_size=batch_size
+    ):
+        sentences += sentence_count
+    seconds = time.perf_counter() - start
+
+    return {
+        "seconds": seconds,
+        "sentences/sec": sentences / seconds if seconds > 0 else 0,
+        "documents/sec": len(documents) / seconds if seconds > 0 else 0,
+    }
+
+
+def run(sizes: list[int], batch_size: int = 64, seed: int = 0) -> dict:
+    translator = Translator()
+    translator.warm_up()
+
+    results = {}
+    for size in sizes:
+        documents = corpus.generate(size, seed=seed)
+        print(f"{size} sentences, {len(documents)} documents", file=sys.stderr)
+
+        results[str(size)] = {
+            "sentences": size,
+            "documents": len(documents),
+            "stages": stage_latencies(translator, documents),
+            "throughput": throughput(translator, documents, batch_size),
+            "peak rss MB": peak_memory() / MEGABYTE,
+        }
+
+    return {
+        "commit": current_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "packages": {
+            package: package_version(package)
+            for package in ["spacy", "en_core_web_sm", "coreferee", "scikit-learn"]
+        },
+        "batch size": batch_size,
+        "seed": seed,
+        "pipelines": pipelines.report(),
+        "sizes": results,
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def package_version(package: str) -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "missing"
+
+
+def print_results(results: dict):
+    for size, result in results["sizes"].items():
+        print(
+            "{} sentences\t{:.1f} sentences/sec\t{:.1f} MB peak".format(
+                size, result["throughput"]["sentences/sec"], result["peak rss MB"]
+            )
+        )
+        for name, stage in result["stages"].items():
+            latency = stage["latency ms"]
+            print(
+                "  {:<10}{:>7} calls  p50 {:8.3f} ms  p90 {:8.3f} ms  p99 {:8.3f} ms".format(
+                    name, stage["calls"], latency["p50"], latency["p90"], latency["p99"]
+                )
+            )
+
+
+if __name__ == "__main__":
+    results = run(SIZES, batch_size=BATCH_SIZE, seed=SEED)
+    with open(ARGS[0], "w") as out:
+        json.dump(results, out, indent=2)
+
+    print_results(results)
+    print(f"Saved to {ARGS[0]}")
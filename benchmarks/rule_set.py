@@ -0,0 +1,127 @@
+"""
+Per-sentence extraction latency over a long run
+
+Compares the compiled rule sets with the old behaviour of adding every rule to the
+matcher again on each call. The sentences are parsed once up front, so only matching
+and the rule actions are timed.
+"""
+import sys
+import time
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print(
+            "Usage: python -m benchmarks.rule_set [sentences] [legacy-sentences]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+import spacy
+
+from extraction import parse, pipelines
+
+SENTENCES = {
+    "class": [
+        "The student is a class.",
+        "There is a course.",
+        "A school has a name.",
+        "A class named Department.",
+        "A library contains books, magazines and newspapers.",
+    ],
+    "rel": [
+        "A school has one or more departments.",
+        "The course is taught by a teacher.",
+        "A library is composed of shelves.",
+        "A customer places an order.",
+        "An order with a receipt.",
+    ],
+}
+
+WINDOW = 1000  # sentences per reported latency
+
+
+def compiled_run(n_sentences: int):
+    """
+    Mean latency in microseconds of each window, with the frozen rule sets
+    """
+    docs = parsed_sentences()
+    extractors = {
+        kind: parse.LazyLoadedExtractor("", kind).extractor for kind in SENTENCES
+    }
+
+    latencies = []
+    elapsed = 0
+    for i in range(n_sentences):
+        kind, doc = docs[i % len(docs)]
+        extractor = extractors[kind]
+        extractor.spacy_doc = doc
+
+        start = time.perf_counter_ns()
+        extractor.parse(verbose=False)
+        elapsed += time.perf_counter_ns() - start
+
+        if (i + 1) % WINDOW == 0:
+            latencies.append(elapsed / WINDOW / 1000)
+            elapsed = 0
+
+    return latencies
+
+
+def legacy_run(n_sentences: int):
+    """
+    Same as compiled_run, but the patterns are added to the matcher before every
+    sentence like LazyLoadedExtractor used to do
+    """
+    docs = parsed_sentences()
+    vocab = pipelines.get("extraction").vocab
+    matchers = {kind: spacy.matcher.DependencyMatcher(vocab) for kind in SENTENCES}
+
+    latencies = []
+    elapsed = 0
+    for i in range(n_sentences):
+        kind, doc = docs[i % len(docs)]
+        matcher = matchers[kind]
+
+        start = time.perf_counter_ns()
+        for name, pattern in parse.compiled_rule_set(kind).patterns.items():
+            matcher.add(name, pattern)
+        matcher(doc)
+        elapsed += time.perf_counter_ns() - start
+
+        if (i + 1) % WINDOW == 0:
+            latencies.append(elapsed / WINDOW / 1000)
+            elapsed = 0
+
+    return latencies
+
+
+def parsed_sentences():
+    nlp = pipelines.get("extraction")
+    return [
+        (kind, nlp(sentence))
+        for kind, sentences in SENTENCES.items()
+        for sentence in sentences
+    ]
+
+
+def summarize(name: str, latencies: list[float]):
+    if len(latencies) == 0:
+        print(f"{name}: fewer than {WINDOW} sentences, nothing to report")
+        return
+
+    print(
+        f"{name}: {len(latencies) * WINDOW} sentences",
+        f"first window {latencies[0]:.1f} us/sentence",
+        f"last window {latencies[-1]:.1f} us/sentence",
+        f"growth x{latencies[-1] / latencies[0]:.2f}",
+        sep="\t",
+    )
+
+
+if __name__ == "__main__":
+    n_sentences = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    # the legacy matcher grows without bound, keep its run short
+    n_legacy = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    summarize("compiled", compiled_run(n_sentences))
+    summarize("legacy", legacy_run(n_legacy))
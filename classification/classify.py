@@ -1,9 +1,48 @@
 # Classifies the data
 
 import sys
+
+def pop_option(name: str, default=None):
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    value = sys.argv[index + 1]
+    del sys.argv[index : index + 2]
+    return value
+
+# also write the arrays of numpy_predict.py next to the pickles
+EXPORT = "--export" in sys.argv
+if EXPORT:
+    sys.argv.remove("--export")
+
+# columns of the hashing vectorizers, the memory of their model does not depend on the data
+N_FEATURES = int(pop_option("--n-features", 2 ** 14))
+
+import models
+
+# every model with every vectorizer, see sweep.py
+if "--sweep" in sys.argv:
+    sys.argv.remove("--sweep")
+    folds = int(pop_option("--folds", 5))
+    workers = int(pop_option("--workers", 0)) or None
+    out_path = pop_option("--out", "leaderboard.json")
+    vectorizers = pop_option("--vectorizers", ",".join(models.VECTORIZERS)).split(",")
+    model_names = pop_option("--models", ",".join(models.MODELS)).split(",")
+
+    if len(sys.argv) != 2:
+        print("Usage: py classify.py data-file --sweep [--folds 5] [--workers n] [--out leaderboard.json] [--vectorizers a,b] [--models a,b] [--n-features n]", file=sys.stderr)
+        exit(1)
+
+    import sweep
+    sweep.main(sys.argv[1], out_path, vectorizers, model_names, folds, workers, n_features=N_FEATURES)
+    exit(0)
+
 if len(sys.argv) != 4:
-    print("Usage: py classify.py data-file model vectorizer", file=sys.stderr)
-    print("ex: py classify.py ../data/fragments.csv bernoulliNB tfidf", file=sys.stderr)
+    print("Usage: py classify.py data-file model vectorizer [--export] [--n-features n]", file=sys.stderr)
+    print("       py classify.py data-file --sweep [--folds 5] [--workers n] [--out leaderboard.json]", file=sys.stderr)
+    print("vectorizers: {}".format(", ".join(models.VECTORIZERS)), file=sys.stderr)
+    print("models: {}".format(", ".join(models.MODELS)), file=sys.stderr)
+    print("ex: py classify.py ../data/fragments.csv bernoulliNB tfidf --export", file=sys.stderr)
     exit(1)
 
 import pandas as pd
@@ -18,60 +57,13 @@ def train(vectorizer: str, model: str):
     global X_train, y_train
 
     # vectorize using simple statistics
-
-    if vectorizer == "count":
-        from sklearn.feature_extraction.text import CountVectorizer
-        vec = CountVectorizer().fit(X_train)
-
-    elif vectorizer == "tfidf":
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        vec = TfidfVectorizer().fit(X_train)
-    
-    else:
-        raise Exception("Vectorizer unknown:{}".format(vectorizer))
+    vec = models.make_vectorizer(vectorizer, N_FEATURES).fit(X_train)
 
     X_train = vec.transform(X_train)
 
 
     # train the model
-    if model == "bernoulliNB":
-        from sklearn.naive_bayes import BernoulliNB
-        trained_model = BernoulliNB()
-
-    elif model == "multinomialNB":
-        from sklearn.naive_bayes import MultinomialNB
-        trained_model = MultinomialNB()
-
-    elif model == "knn":
-        from sklearn.neighbors import KNeighborsClassifier
-        trained_model = KNeighborsClassifier(3)
-
-    elif model == "linearSVC":
-        from sklearn.svm import LinearSVC
-        trained_model = LinearSVC(C=0.025)
-
-    elif model == "svc":
-        from sklearn.svm import SVC
-        trained_model = SVC(gamma=2, C=1)
-
-    elif model == "gaussian":
-        from sklearn.gaussian_process import GaussianProcessClassifier
-        trained_model = GaussianProcessClassifier()
-
-    elif model == "ada":
-        from sklearn.ensemble import AdaBoostClassifier
-        trained_model = AdaBoostClassifier()
-
-    elif model == "forest":
-        from sklearn.ensemble import RandomForestClassifier
-        trained_model = RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1)
-
-    elif model == "logistic":
-        from sklearn.linear_model import LogisticRegression
-        trained_model = LogisticRegression()
-
-    else:
-        raise Exception("Model unknown")
+    trained_model = models.make_model(model)
 
     return vec, trained_model.fit(X_train, y_train)
 
@@ -92,9 +84,18 @@ import pickle
 pickle.dump(trained_model, open(f"{model_type}.pickle", "wb"))
 pickle.dump(vec, open(f"{vectorizer_type}.vec", "wb"))
 
+# what every process that classifies has to load
+print("Memory: vectorizer {:.1f} kB, model {:.1f} kB (pickled)".format(
+    len(pickle.dumps(vec)) / 1000, len(pickle.dumps(trained_model)) / 1000))
+
+if EXPORT:
+    import numpy_predict
+    numpy_predict.export(vec, trained_model, model_type, [f"{model_type}.pickle", f"{vectorizer_type}.vec"])
+
 # print(test(vec, trained_model))
 
-# Performances:
+# Performances, measured one train.sh run at a time. classify.py data-file --sweep measures
+# them all with cross-validation, see sweep.py:
 #                           Vectorizers     Word Embeddings
 #   Model                   Tf-idf  Count   
 #   -------------------------------------
@@ -106,4 +107,11 @@ pickle.dump(vec, open(f"{vectorizer_type}.vec", "wb"))
 #   Gaussian                --      --
 #   ADA                     85      85
 #   Random Forest           81      70
-#   Logistic Regression     86      85-95
\ No newline at end of file
+#   Logistic Regression     86      85-95
+
+# Memory of the Bernoulli Bayes pickles:
+#   Vectorizer              Vectorizer      Model
+#   -------------------------------------
+#   Tf-idf                  23 kB           25 kB       grows with the vocabulary (760 words)
+#   Hashing, 2 ** 14        0.4 kB          525 kB      fixed by --n-features
+#   Hashing + tf-idf        132 kB          525 kB      fixed by --n-features
\ No newline at end of file
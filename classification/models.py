@@ -0,0 +1,113 @@
+# The vectorizers and models that classify.py can train, untrained
+
+VECTORIZERS = ["count", "tfidf", "hashing", "hashing-tfidf"]
+MODELS = [
+    "bernoulliNB",
+    "multinomialNB",
+    "knn",
+    "linearSVC",
+    "svc",
+    "gaussian",
+    "ada",
+    "forest",
+    "logistic",
+    "sgd",
+    "sgd-logistic",
+]
+
+
+def make_vectorizer(vectorizer: str, n_features: int = 2**14):
+    """
+    n_features is the number of columns of the hashing vectorizers
+    """
+    # vectorize using simple statistics
+
+    if vectorizer == "count":
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        return CountVectorizer()
+
+    elif vectorizer == "tfidf":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        return TfidfVectorizer()
+
+    # no vocabulary, the columns are hashes of the words. No alternate signs, the naive
+    # Bayes models need counts
+    elif vectorizer == "hashing":
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        return HashingVectorizer(n_features=n_features, alternate_sign=False)
+
+    elif vectorizer == "hashing-tfidf":
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+        from sklearn.pipeline import make_pipeline
+
+        return make_pipeline(
+            HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None),
+            TfidfTransformer(),
+        )
+
+    else:
+        raise Exception("Vectorizer unknown:{}".format(vectorizer))
+
+
+def make_model(model: str):
+    if model == "bernoulliNB":
+        from sklearn.naive_bayes import BernoulliNB
+
+        return BernoulliNB()
+
+    elif model == "multinomialNB":
+        from sklearn.naive_bayes import MultinomialNB
+
+        return MultinomialNB()
+
+    elif model == "knn":
+        from sklearn.neighbors import KNeighborsClassifier
+
+        return KNeighborsClassifier(3)
+
+    elif model == "linearSVC":
+        from sklearn.svm import LinearSVC
+
+        return LinearSVC(C=0.025)
+
+    elif model == "svc":
+        from sklearn.svm import SVC
+
+        return SVC(gamma=2, C=1)
+
+    elif model == "gaussian":
+        from sklearn.gaussian_process import GaussianProcessClassifier
+
+        return GaussianProcessClassifier()
+
+    elif model == "ada":
+        from sklearn.ensemble import AdaBoostClassifier
+
+        return AdaBoostClassifier()
+
+    elif model == "forest":
+        from sklearn.ensemble import RandomForestClassifier
+
+        return RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1)
+
+    elif model == "logistic":
+        from sklearn.linear_model import LogisticRegression
+
+        return LogisticRegression()
+
+    # linear models that can also learn in chunks, see train_stream.py
+    elif model == "sgd":
+        from sklearn.linear_model import SGDClassifier
+
+        return SGDClassifier()
+
+    elif model == "sgd-logistic":
+        from sklearn.linear_model import SGDClassifier
+
+        return SGDClassifier(loss="log_loss")
+
+    else:
+        raise Exception("Model unknown:{}".format(model))
@@ -0,0 +1,375 @@
+# Bernoulli Naive Bayes predictions without scikit-learn
+#
+# export writes what the tf-idf vectorizer and the BernoulliNB model need at prediction
+# time: the vocabulary to a text file, one term per line in the order of the features,
+# and the idf weights with the log-probabilities of the model to an uncompressed .npz.
+# A hashing vectorizer has no vocabulary, the column of a word is its MurmurHash3.
+# NumpyClassifier memory-maps the arrays, so loading neither imports scikit-learn nor
+# unpickles anything.
+
+import os
+import sys
+
+USAGE = """Usage: py numpy_predict.py text-to-classify
+       py numpy_predict.py --export [model.pickle vectorizer.vec out-prefix]"""
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 5] or (
+        len(sys.argv) == 5 and sys.argv[1] != "--export"
+    ):
+        print(USAGE, file=sys.stderr)
+        exit(1)
+
+import hashlib
+import json
+import math
+import re
+import threading
+import zipfile
+from collections import Counter
+
+import numpy as np
+
+PATH = os.path.abspath(os.path.dirname(__file__))
+EXPORT_PREFIX = os.path.join(PATH, "bernoulliNB")
+
+# the arrays of the .npz
+ARRAYS = ["idf", "weights", "bias", "classes"]
+
+# hashes kept by a classifier with a hashing vectorizer
+HASHED_TOKENS_CACHE = 100_000
+
+
+def files_digest(paths: list[str]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as hashed:
+            digest.update(hashed.read())
+    return digest.hexdigest()
+
+
+def vectorizer_parts(vec) -> tuple:
+    """
+    The vectorizer that counts the words and the tf-idf transformer after it, None if
+    the counts are used as they are
+    """
+    if hasattr(vec, "steps"):
+        # a pipeline of classify.py, e.g. hashing then tf-idf
+        if len(vec.steps) != 2 or type(vec.steps[1][1]).__name__ != "TfidfTransformer":
+            raise Exception(
+                "Only a vectorizer then tf-idf can be exported: {}".format(vec)
+            )
+        return vec.steps[0][1], vec.steps[1][1]
+
+    # pickles of older scikit-learn keep the idf in the inner transformer
+    return vec, getattr(vec, "_tfidf", None)
+
+
+def vectorizer_settings(vec) -> dict:
+    """
+    The settings of a CountVectorizer, TfidfVectorizer or HashingVectorizer that change
+    its output, if they can be reproduced here
+    """
+    words, transformer = vectorizer_parts(vec)
+    if (
+        words.analyzer != "word"
+        or words.tokenizer is not None
+        or words.preprocessor is not None
+    ):
+        raise Exception("Only the default word analyzer can be exported")
+    if tuple(words.ngram_range) != (1, 1):
+        raise Exception("Only unigrams can be exported: {}".format(words.ngram_range))
+    if words.strip_accents is not None or words.stop_words is not None:
+        raise Exception("Accent stripping and stop words cannot be exported")
+
+    settings = {
+        "lowercase": bool(words.lowercase),
+        "token_pattern": words.token_pattern,
+        "binary": bool(words.binary),
+        "hashing": None,
+        "use_idf": False,
+        "sublinear_tf": False,
+        "norm": None,
+    }
+
+    if type(words).__name__ == "HashingVectorizer":
+        if words.alternate_sign:
+            raise Exception("Only hashing without alternate signs can be exported")
+        if words.norm is not None and transformer is not None:
+            raise Exception("Hashing cannot be normalized before tf-idf")
+        settings["hashing"] = int(words.n_features)
+        settings["norm"] = words.norm
+
+    if transformer is not None:
+        settings["use_idf"] = bool(transformer.use_idf)
+        settings["sublinear_tf"] = bool(transformer.sublinear_tf)
+        settings["norm"] = transformer.norm
+    return settings
+
+
+def idf_of(vec, n_features: int) -> np.ndarray:
+    _, transformer = vectorizer_parts(vec)
+    if transformer is None or not transformer.use_idf:
+        return np.ones(n_features)
+    if hasattr(transformer, "idf_"):
+        return np.asarray(transformer.idf_, dtype=np.float64)
+    # scikit-learn before 1.0 kept a diagonal matrix
+    return np.asarray(transformer._idf_diag.diagonal(), dtype=np.float64)
+
+
+def murmurhash3_32(key: str, seed: int = 0) -> int:
+    """
+    Signed MurmurHash3 (x86, 32 bits) of the UTF-8 bytes of a string, the hash of
+    sklearn.utils.murmurhash3_32 and of HashingVectorizer
+    """
+    data = key.encode("utf-8")
+    length = len(data)
+    h = seed
+    c1 = 0xCC9E2D51
+    c2 = 0x1B873593
+
+    rounded = length - length % 4
+    for start in range(0, rounded, 4):
+        k = int.from_bytes(data[start : start + 4], "little")
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xE6546B64) & 0xFFFFFFFF
+
+    k = int.from_bytes(data[rounded:], "little")
+    if k or length % 4:
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def export(vec, model, prefix: str = EXPORT_PREFIX, source_paths: list[str] = None):
+    """
+    Writes prefix.npz and prefix.vocab, or only prefix.npz for a hashing vectorizer.
+    source_paths are the pickles they come from, their hash is kept to tell if the
+    export is out of date.
+    """
+    if type(model).__name__ != "BernoulliNB":
+        raise Exception("Only BernoulliNB can be exported: {}".format(type(model)))
+
+    settings = vectorizer_settings(vec)
+    settings["binarize"] = model.binarize
+    settings["source"] = None if source_paths is None else files_digest(source_paths)
+
+    if settings["hashing"] is None:
+        vocabulary = sorted(vec.vocabulary_.items(), key=lambda item: item[1])
+        if [index for _, index in vocabulary] != list(range(len(vocabulary))):
+            raise Exception("The vocabulary indices are not contiguous")
+        n_features = len(vocabulary)
+    else:
+        vocabulary = None
+        n_features = settings["hashing"]
+
+    # the same operations as BernoulliNB._joint_log_likelihood
+    feature_log_prob = np.asarray(model.feature_log_prob_, dtype=np.float64)
+    neg_prob = np.log(1 - np.exp(feature_log_prob))
+    weights = feature_log_prob - neg_prob
+    bias = model.class_log_prior_ + neg_prob.sum(axis=1)
+
+    np.savez(
+        prefix + ".npz",
+        idf=idf_of(vec, n_features),
+        # features first, the predictions read one row per word
+        weights=np.ascontiguousarray(weights.T),
+        bias=bias,
+        classes=np.asarray([str(kind) for kind in model.classes_]),
+        settings=np.asarray(json.dumps(settings)),
+    )
+    if vocabulary is not None:
+        with open(prefix + ".vocab", "w", encoding="utf-8") as vocab_file:
+            for term, _ in vocabulary:
+                vocab_file.write(term + "\n")
+
+
+def memory_map_npz(path: str) -> dict[str, np.ndarray]:
+    """
+    The arrays of an uncompressed .npz, memory-mapped. np.load ignores mmap_mode for
+    .npz files.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as npz:
+        for member in archive.infolist():
+            if member.compress_type != zipfile.ZIP_STORED:
+                raise Exception("Compressed array cannot be mapped: {}".format(path))
+
+            # the data starts after the local header of the member
+            npz.seek(member.header_offset)
+            header = npz.read(30)
+            name_length = int.from_bytes(header[26:28], "little")
+            extra_length = int.from_bytes(header[28:30], "little")
+            npz.seek(member.header_offset + 30 + name_length + extra_length)
+
+            if np.lib.format.read_magic(npz) == (1, 0):
+                read_header = np.lib.format.read_array_header_1_0
+            else:
+                read_header = np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(npz)
+            name = member.filename[: -len(".npy")]
+            if dtype.hasobject:
+                raise Exception("Array of objects in {}: {}".format(path, name))
+            if shape == () or 0 in shape:
+                # nothing worth mapping, e.g. the settings
+                arrays[name] = np.fromfile(
+                    npz, dtype=dtype, count=1 if shape == () else 0
+                ).reshape(shape)
+            else:
+                arrays[name] = np.memmap(
+                    path,
+                    dtype=dtype,
+                    mode="r",
+                    offset=npz.tell(),
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                )
+    return arrays
+
+
+class NumpyClassifier:
+    """
+    Same interface as LazyLoadedClassifier, loaded from the files of export
+    """
+
+    def __init__(self, prefix: str = EXPORT_PREFIX) -> None:
+        self.prefix = prefix
+        self.is_loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self.is_loaded:
+            return
+        with self._lock:
+            if self.is_loaded:
+                return
+
+            arrays = memory_map_npz(self.prefix + ".npz")
+            for name in ARRAYS + ["settings"]:
+                if name not in arrays:
+                    raise Exception("No {} in {}.npz".format(name, self.prefix))
+            self.settings = json.loads(str(arrays["settings"]))
+            self.idf = arrays["idf"]
+            self.weights = arrays["weights"]
+            self.bias = np.asarray(arrays["bias"])
+            self.classes = [str(kind) for kind in arrays["classes"]]
+
+            if self.settings.get("hashing") is None:
+                with open(self.prefix + ".vocab", encoding="utf-8") as vocab_file:
+                    terms = vocab_file.read().split("\n")[:-1]
+                self.vocabulary = {term: index for index, term in enumerate(terms)}
+                if len(self.vocabulary) != len(self.idf):
+                    raise Exception(
+                        "{}.vocab does not match {}.npz".format(
+                            self.prefix, self.prefix
+                        )
+                    )
+            else:
+                # the column of a word is its hash, there is no vocabulary to load
+                self.vocabulary = None
+                self._columns = {}
+
+            self.token_pattern = re.compile(self.settings["token_pattern"])
+            self.is_loaded = True
+
+    def source_digest(self) -> str:
+        self.load()
+        return self.settings["source"]
+
+    def hashed_column(self, token: str) -> int:
+        column = self._columns.get(token)
+        if column is None:
+            column = abs(murmurhash3_32(token)) % self.settings["hashing"]
+            # bounded, unlike a vocabulary
+            if len(self._columns) < HASHED_TOKENS_CACHE:
+                self._columns[token] = column
+        return column
+
+    def features(self, text: str) -> tuple[list[int], list[float]]:
+        """
+        The non-zero columns of the tf-idf row of a text, like vec.transform
+        """
+        if self.settings["lowercase"]:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.vocabulary is None:
+            counts = Counter(self.hashed_column(token) for token in tokens)
+        else:
+            counts = Counter(
+                self.vocabulary[token] for token in tokens if token in self.vocabulary
+            )
+
+        columns = sorted(counts)
+        values = []
+        for column in columns:
+            value = 1.0 if self.settings["binary"] else float(counts[column])
+            if self.settings["sublinear_tf"]:
+                value = math.log(value) + 1
+            values.append(value * self.idf[column])
+
+        norm = self.settings["norm"]
+        if norm == "l2":
+            length = math.sqrt(sum(value * value for value in values))
+        elif norm == "l1":
+            length = sum(abs(value) for value in values)
+        else:
+            length = 0
+        if length > 0:
+            values = [value / length for value in values]
+        return columns, values
+
+    def predict(self, text: str) -> str:
+        return self.predict_many([text])[0]
+
+    def predict_many(self, sentences: list[str]) -> list[str]:
+        self.load()
+        binarize = self.settings["binarize"]
+
+        kinds = []
+        for sentence in sentences:
+            columns, values = self.features(sentence)
+            if binarize is not None:
+                columns = [
+                    column for column, value in zip(columns, values) if value > binarize
+                ]
+                values = np.ones(len(columns))
+            # joint log likelihood of each class
+            likelihood = self.bias + np.asarray(values) @ self.weights[columns]
+            kinds.append(self.classes[int(np.argmax(likelihood))])
+        return kinds
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--export":
+        import pickle
+
+        if len(sys.argv) == 5:
+            model_path, vec_path, prefix = sys.argv[2:]
+        else:
+            model_path = os.path.join(PATH, "bernoulliNB.pickle")
+            vec_path = os.path.join(PATH, "tfidf.vec")
+            prefix = EXPORT_PREFIX
+
+        with open(model_path, "rb") as model_file, open(vec_path, "rb") as vec_file:
+            export(
+                pickle.load(vec_file),
+                pickle.load(model_file),
+                prefix,
+                [model_path, vec_path],
+            )
+        print("Saved {0}.npz and {0}.vocab".format(prefix))
+    else:
+        print(NumpyClassifier().predict(sys.argv[1]))
@@ -3,6 +3,7 @@
 import os
 import sys
 import pickle
+import threading
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -24,21 +25,46 @@ if __name__ == "__main__":
     print(model.predict(vec.transform([sys.argv[1]])))
 
 
+MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bernoulliNB.pickle"
+)
+VECTORIZER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tfidf.vec")
+
+
 class LazyLoadedClassifier:
+    """
+    Loads the model and the vectorizer on the first prediction and keeps them. Safe to
+    share between threads.
+    """
+
     def __init__(self) -> None:
         self.is_loaded = False
         self.model = None
         self.vec = None
+        self._lock = threading.Lock()
 
-    def predict(self, text: str) -> str:
+    def load(self):
+        if self.is_loaded:
+            return
+        with self._lock:
+            if self.is_loaded:
+                return
+            with open(MODEL_PATH, "rb") as model_file:
+                self.model = pickle.load(model_file)
+            with open(VECTORIZER_PATH, "rb") as vec_file:
+                self.vec = pickle.load(vec_file)
+            self.is_loaded = True
 
-        path = os.path.abspath(os.path.dirname(__file__))
+    def predict(self, text: str) -> str:
+        return self.predict_many([text])[0]
 
-        if self.is_loaded:
-            model = self.model
-            vec = self.vec
-        else:
-            model = pickle.load(open(os.path.join(path, "bernoulliNB.pickle"), "rb"))
-            vec = pickle.load(open(os.path.join(path, "tfidf.vec"), "rb"))
+    def predict_many(self, sentences: list[str]) -> list[str]:
+        """
+        Kinds of many sentences, with one transform and one prediction for all of them
+        """
+        sentences = list(sentences)
+        if len(sentences) == 0:
+            return []
 
-        return model.predict(vec.transform([text]))[0]
+        self.load()
+        return [str(kind) for kind in self.model.predict(self.vec.transform(sentences))]
@@ -0,0 +1,202 @@
+# Trains every model with every vectorizer of models.py, with k-fold cross-validation,
+# and ranks them on accuracy and speed. Run by classify.py --sweep.
+
+import json
+import multiprocessing
+import os
+import pickle
+import statistics
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+import models
+
+# sentences predicted one at a time for the latency of each fold
+LATENCY_SENTENCES = 100
+
+
+def evaluate(task: tuple) -> dict:
+    """
+    Cross-validation of one vectorizer and model. The row has the error instead of the
+    scores if they cannot be trained, e.g. a model that needs dense data.
+    """
+    vectorizer, model, sentences, kinds, folds, seed, n_features = task
+
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.model_selection import StratifiedKFold
+
+    row = {"vectorizer": vectorizer, "model": model}
+    scores = {
+        "accuracy": [],
+        "f1": [],
+        "train s": [],
+        "batch us per sentence": [],
+        "latency us": [],
+        "vectorizer kB": [],
+        "model kB": [],
+    }
+
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            splits = StratifiedKFold(folds, shuffle=True, random_state=seed).split(
+                sentences, kinds
+            )
+            for train_index, test_index in splits:
+                X_train = [sentences[i] for i in train_index]
+                y_train = [kinds[i] for i in train_index]
+                X_test = [sentences[i] for i in test_index]
+                y_test = [kinds[i] for i in test_index]
+
+                start = time.perf_counter()
+                vec = models.make_vectorizer(vectorizer, n_features).fit(X_train)
+                trained_model = models.make_model(model).fit(
+                    vec.transform(X_train), y_train
+                )
+                scores["train s"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                pred = trained_model.predict(vec.transform(X_test))
+                scores["batch us per sentence"].append(
+                    (time.perf_counter() - start) / len(X_test) * 1e6
+                )
+
+                # as the pipeline classifies a single sentence
+                latencies = []
+                for sentence in X_test[:LATENCY_SENTENCES]:
+                    start = time.perf_counter()
+                    trained_model.predict(vec.transform([sentence]))
+                    latencies.append(time.perf_counter() - start)
+                scores["latency us"].append(statistics.median(latencies) * 1e6)
+
+                scores["accuracy"].append(accuracy_score(y_test, pred))
+                scores["f1"].append(f1_score(y_test, pred, average="macro"))
+                scores["vectorizer kB"].append(len(pickle.dumps(vec)) / 1000)
+                scores["model kB"].append(len(pickle.dumps(trained_model)) / 1000)
+    except Exception as error:
+        row["error"] = "{}: {}".format(type(error).__name__, error)
+        return row
+
+    for name, values in scores.items():
+        row[name] = statistics.mean(values)
+    row["accuracy std"] = statistics.pstdev(scores["accuracy"])
+    row["warnings"] = len(caught)
+    return row
+
+
+def sweep(
+    sentences: list[str],
+    kinds: list[str],
+    vectorizers: list[str] = models.VECTORIZERS,
+    model_names: list[str] = models.MODELS,
+    folds: int = 5,
+    workers: int = None,
+    seed: int = 0,
+    n_features: int = 2**14,
+) -> list[dict]:
+    """
+    A row per vectorizer and model, the best accuracy first. The ties go to the lowest
+    latency, the rows with an error are last.
+    """
+    tasks = [
+        (vectorizer, model, sentences, kinds, folds, seed, n_features)
+        for vectorizer in vectorizers
+        for model in model_names
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    # classify.py is a script, a spawned worker would run it again
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            rows = pool.map(evaluate, tasks, chunksize=1)
+    else:
+        rows = [evaluate(task) for task in tasks]
+
+    return sorted(
+        rows,
+        key=lambda row: (
+            "error" in row,
+            -row.get("accuracy", 0),
+            row.get("latency us", 0),
+        ),
+    )
+
+
+def print_leaderboard(rows: list[dict], file=sys.stdout):
+    print(
+        "{:<16}{:<16}{:>10}{:>8}{:>9}{:>12}{:>12}{:>12}{:>11}".format(
+            "Vectorizer",
+            "Model",
+            "Accuracy",
+            "F1",
+            "Train s",
+            "Latency us",
+            "Batch us",
+            "Vec kB",
+            "Model kB",
+        ),
+        file=file,
+    )
+    for row in rows:
+        if "error" in row:
+            print(
+                "{:<16}{:<16}{}".format(row["vectorizer"], row["model"], row["error"]),
+                file=file,
+            )
+            continue
+        print(
+            "{:<16}{:<16}{:>10.1%}{:>8.3f}{:>9.2f}{:>12.0f}{:>12.1f}{:>12.1f}{:>11.1f}".format(
+                row["vectorizer"],
+                row["model"],
+                row["accuracy"],
+                row["f1"],
+                row["train s"],
+                row["latency us"],
+                row["batch us per sentence"],
+                row["vectorizer kB"],
+                row["model kB"],
+            ),
+            file=file,
+        )
+
+
+def main(
+    data_path: str,
+    out_path: str,
+    vectorizers: list[str] = models.VECTORIZERS,
+    model_names: list[str] = models.MODELS,
+    folds: int = 5,
+    workers: int = None,
+    seed: int = 0,
+    n_features: int = 2**14,
+):
+    df = pd.read_csv(data_path).dropna(subset=["english", "kind"])
+    sentences = [str(sentence) for sentence in df["english"]]
+    kinds = [str(kind) for kind in df["kind"]]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    rows = sweep(
+        sentences, kinds, vectorizers, model_names, folds, workers, seed, n_features
+    )
+    print_leaderboard(rows)
+
+    import sklearn
+
+    leaderboard = {
+        "data": os.path.abspath(data_path),
+        "sentences": len(sentences),
+        "folds": folds,
+        "seed": seed,
+        "workers": workers,
+        "n_features": n_features,
+        "scikit-learn": sklearn.__version__,
+        "seconds": time.perf_counter() - start,
+        "rows": rows,
+    }
+    with open(out_path, "w") as out_file:
+        json.dump(leaderboard, out_file, indent=2)
+    print("Saved the leaderboard to {}".format(out_path), file=sys.stderr)
@@ -0,0 +1,52 @@
+# Checks that numpy_predict.py predicts the same kinds as the scikit-learn pickles
+
+import sys
+
+if len(sys.argv) not in [2, 3]:
+    print("Usage: py test_numpy_predict.py data-file [export-prefix]", file=sys.stderr)
+    print("ex: py test_numpy_predict.py ../data/fragments.csv", file=sys.stderr)
+    exit(1)
+
+import os
+import pickle
+
+import pandas as pd
+
+import numpy_predict
+
+path = os.path.abspath(os.path.dirname(__file__))
+model_path = os.path.join(path, "bernoulliNB.pickle")
+vec_path = os.path.join(path, "tfidf.vec")
+prefix = sys.argv[2] if len(sys.argv) == 3 else numpy_predict.EXPORT_PREFIX
+
+model = pickle.load(open(model_path, "rb"))
+vec = pickle.load(open(vec_path, "rb"))
+
+classifier = numpy_predict.NumpyClassifier(prefix)
+if classifier.source_digest() != numpy_predict.files_digest([model_path, vec_path]):
+    print(
+        "{}.npz was not exported from the current pickles, run py numpy_predict.py --export".format(
+            prefix
+        ),
+        file=sys.stderr,
+    )
+    exit(1)
+
+sentences = [str(sentence) for sentence in pd.read_csv(sys.argv[1])["english"]]
+
+expected = [str(kind) for kind in model.predict(vec.transform(sentences))]
+predicted = classifier.predict_many(sentences)
+
+mismatches = [
+    (sentence, kind, numpy_kind)
+    for sentence, kind, numpy_kind in zip(sentences, expected, predicted)
+    if kind != numpy_kind
+]
+for sentence, kind, numpy_kind in mismatches:
+    print("scikit-learn: {}\tnumpy: {}\t{}".format(kind, numpy_kind, sentence))
+
+print(
+    "Same prediction: {} of {}".format(len(sentences) - len(mismatches), len(sentences))
+)
+if len(mismatches) > 0:
+    exit(1)
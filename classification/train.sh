@@ -6,4 +6,4 @@ if [ $# -ne 1 ]; then
   exit 1
 fi
 
-python classify.py "$1" bernoulliNB tfidf
\ No newline at end of file
+python classify.py "$1" bernoulliNB tfidf --export
\ No newline at end of file
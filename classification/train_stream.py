@@ -0,0 +1,275 @@
+# Trains a classifier on a CSV too large for memory, one chunk at a time
+
+import sys
+
+USAGE = """Usage: py train_stream.py data-file model vectorizer [options]
+models: bernoulliNB, multinomialNB, sgd, sgd-logistic
+vectorizers: hashing, hashing-tfidf
+options:
+    --chunk-size n          rows read at a time (10000)
+    --checkpoint path       where the training is saved (model.checkpoint)
+    --checkpoint-every n    chunks between checkpoints (10)
+    --resume                continue from the checkpoint
+    --n-features n          columns of the hashing vectorizer (2 ** 14)
+    --export                also write the arrays of numpy_predict.py
+ex: py train_stream.py ../data/fragments.csv bernoulliNB hashing --resume"""
+
+
+def pop_option(name: str, default=None):
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(USAGE, file=sys.stderr)
+        exit(1)
+    value = sys.argv[index + 1]
+    del sys.argv[index : index + 2]
+    return value
+
+
+def pop_flag(name: str) -> bool:
+    if name not in sys.argv:
+        return False
+    sys.argv.remove(name)
+    return True
+
+
+if __name__ == "__main__":
+    CHUNK_SIZE = int(pop_option("--chunk-size", 10000))
+    CHECKPOINT_PATH = pop_option("--checkpoint")
+    CHECKPOINT_EVERY = int(pop_option("--checkpoint-every", 10))
+    N_FEATURES = int(pop_option("--n-features", 2**14))
+    RESUME = pop_flag("--resume")
+    EXPORT = pop_flag("--export")
+
+    if len(sys.argv) != 4:
+        print(USAGE, file=sys.stderr)
+        exit(1)
+
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+import models
+
+# every kind must be known before the first chunk
+CLASSES = ["class", "rel"]
+
+
+def make_model(model: str):
+    """
+    A model of models.py that learns with partial_fit
+    """
+    trained_model = models.make_model(model)
+    if not hasattr(trained_model, "partial_fit"):
+        raise Exception("Model cannot be trained in chunks:{}".format(model))
+    return trained_model
+
+
+def make_vectorizer(vectorizer: str, n_features: int):
+    """
+    A hashing vectorizer of models.py. A vocabulary would grow with the corpus, the
+    columns of a hashing vectorizer do not.
+    """
+    if vectorizer not in ["hashing", "hashing-tfidf"]:
+        raise Exception("Vectorizer cannot be trained in chunks:{}".format(vectorizer))
+    return models.make_vectorizer(vectorizer, n_features)
+
+
+def read_chunks(path: str, chunk_size: int, skipped_rows: int = 0):
+    """
+    The english and kind of the rows of a CSV, chunk_size rows at a time, after the
+    skipped rows
+    """
+    return pd.read_csv(
+        path,
+        usecols=["english", "kind"],
+        chunksize=chunk_size,
+        # row 0 is the header
+        skiprows=lambda row: 0 < row <= skipped_rows,
+    )
+
+
+def document_frequencies(path: str, hashing, chunk_size: int):
+    """
+    In how many rows each column of the hashing vectorizer is used, and the number of
+    rows. Needs one pass over the CSV, in constant memory.
+    """
+    frequencies = np.zeros(hashing.n_features, dtype=np.int64)
+    n_samples = 0
+    for chunk in read_chunks(path, chunk_size):
+        X = hashing.transform(chunk["english"].fillna("").astype(str))
+        # a column appears once per row of a hashed matrix
+        frequencies += np.bincount(X.indices, minlength=hashing.n_features)
+        n_samples += len(chunk)
+    return frequencies, n_samples
+
+
+def fit_idf(pipeline, frequencies: np.ndarray, n_samples: int):
+    """
+    The pipeline of hashing then tf-idf, given the idf of the whole CSV
+    """
+    hashing, transformer = pipeline.steps[0][1], pipeline.steps[1][1]
+
+    # fitted on one row for its shape, then given the idf as TfidfTransformer.fit
+    # computes it
+    transformer.fit(hashing.transform([""]))
+    if transformer.smooth_idf:
+        frequencies = frequencies + 1
+        n_samples += 1
+    transformer.idf_ = np.log(n_samples / frequencies) + 1
+    return pipeline
+
+
+def save_checkpoint(path: str, state: dict):
+    # written aside then renamed, an interrupted save keeps the previous checkpoint
+    with open(path + ".tmp", "wb") as checkpoint_file:
+        pickle.dump(state, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def load_checkpoint(path: str, settings: dict) -> dict:
+    with open(path, "rb") as checkpoint_file:
+        state = pickle.load(checkpoint_file)
+    if state["settings"] != settings:
+        raise Exception(
+            "Checkpoint {} is of another training: {}".format(path, state["settings"])
+        )
+    return state
+
+
+def train(
+    data_path: str,
+    model: str,
+    vectorizer: str,
+    checkpoint_path: str,
+    chunk_size: int = 10000,
+    checkpoint_every: int = 10,
+    n_features: int = 2**14,
+    resume: bool = False,
+) -> dict:
+    """
+    Fits the model chunk by chunk. Every chunk is scored before the model learns from
+    it, which gives the accuracy without a held-out set. The state is saved every
+    checkpoint_every chunks and at the end.
+    """
+    settings = {
+        "data": os.path.abspath(data_path),
+        "model": model,
+        "vectorizer": vectorizer,
+        "n_features": n_features,
+    }
+
+    if resume and os.path.exists(checkpoint_path):
+        state = load_checkpoint(checkpoint_path, settings)
+        print(
+            "Resuming after {} rows, {} chunks".format(state["rows"], state["chunks"]),
+            file=sys.stderr,
+        )
+    else:
+        state = {
+            "settings": settings,
+            "vec": None,
+            "model": make_model(model),
+            "rows": 0,
+            "chunks": 0,
+            "tested": 0,
+            "correct": 0,
+            "seconds": 0.0,
+        }
+
+    if state["vec"] is None:
+        vec = make_vectorizer(vectorizer, n_features)
+        if vectorizer == "hashing-tfidf":
+            hashing = vec.steps[0][1]
+            vec = fit_idf(vec, *document_frequencies(data_path, hashing, chunk_size))
+        state["vec"] = vec
+        save_checkpoint(checkpoint_path, state)
+
+    vec = state["vec"]
+    trained_model = state["model"]
+    learned = False
+    for chunk in read_chunks(data_path, chunk_size, state["rows"]):
+        start = time.perf_counter()
+        rows = len(chunk)
+        chunk = chunk.dropna()
+        if rows == 0:
+            # the checkpoint already covers the whole CSV
+            continue
+
+        state["rows"] += rows
+        state["chunks"] += 1
+        learned = True
+        if len(chunk) > 0:
+            X = vec.transform(chunk["english"].astype(str))
+            y = chunk["kind"].astype(str).to_numpy()
+
+            if hasattr(trained_model, "classes_"):
+                state["correct"] += int((trained_model.predict(X) == y).sum())
+                state["tested"] += len(y)
+            trained_model.partial_fit(X, y, classes=CLASSES)
+        state["seconds"] += time.perf_counter() - start
+
+        if state["chunks"] % checkpoint_every == 0:
+            save_checkpoint(checkpoint_path, state)
+            print_progress(state)
+
+    if learned:
+        save_checkpoint(checkpoint_path, state)
+    else:
+        print(
+            "Checkpoint {} already covers the whole CSV".format(checkpoint_path),
+            file=sys.stderr,
+        )
+    return state
+
+
+def print_progress(state: dict):
+    accuracy = state["correct"] / state["tested"] if state["tested"] > 0 else 0
+    print(
+        "{} rows, {} chunks, accuracy {:.1%} on {} rows before learning them, {:.1f} s".format(
+            state["rows"],
+            state["chunks"],
+            accuracy,
+            state["tested"],
+            state["seconds"],
+        ),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    model_type = sys.argv[2]
+    vectorizer_type = sys.argv[3]
+    checkpoint_path = CHECKPOINT_PATH or f"{model_type}.checkpoint"
+
+    state = train(
+        sys.argv[1],
+        model_type,
+        vectorizer_type,
+        checkpoint_path,
+        chunk_size=CHUNK_SIZE,
+        checkpoint_every=CHECKPOINT_EVERY,
+        n_features=N_FEATURES,
+        resume=RESUME,
+    )
+    print_progress(state)
+
+    # saved as classify.py saves them
+    with open(f"{model_type}.pickle", "wb") as model_file:
+        pickle.dump(state["model"], model_file)
+    with open(f"{vectorizer_type}.vec", "wb") as vec_file:
+        pickle.dump(state["vec"], vec_file)
+
+    if EXPORT:
+        import numpy_predict
+
+        numpy_predict.export(
+            state["vec"],
+            state["model"],
+            model_type,
+            [f"{model_type}.pickle", f"{vectorizer_type}.vec"],
+        )
@@ -0,0 +1,127 @@
+"""
+Command line client of server.py
+
+Same use as translate.py, but the translation is done by the running server so there is
+no model to load.
+"""
+
+import sys
+
+USAGE = """Usage: python client.py text [--json] [--out path] [--document id] [--url http://127.0.0.1:8765 | --socket path]
+       python client.py --health | --ready | --reload-rules [--url ... | --socket path]"""
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+
+    def pop_option(flag: str, default):
+        if flag not in ARGS:
+            return default
+        position = ARGS.index(flag)
+        value = ARGS[position + 1]
+        del ARGS[position : position + 2]
+        return value
+
+    def pop_flag(flag: str):
+        if flag not in ARGS:
+            return False
+        ARGS.remove(flag)
+        return True
+
+    URL = pop_option("--url", "http://127.0.0.1:8765")
+    SOCKET_PATH = pop_option("--socket", None)
+    OUT_PATH = pop_option("--out", None)
+    DOCUMENT_ID = pop_option("--document", None)
+    AS_JSON = pop_flag("--json")
+    CHECK = (
+        "health"
+        if pop_flag("--health")
+        else "ready"
+        if pop_flag("--ready")
+        else "rules/reload"
+        if pop_flag("--reload-rules")
+        else None
+    )
+
+    if (CHECK is None and len(ARGS) != 1) or (CHECK is not None and len(ARGS) != 0):
+        print(USAGE, file=sys.stderr)
+        exit(1)
+
+import http.client
+import json
+import os
+import socket
+import urllib.parse
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(url: str = "http://127.0.0.1:8765", socket_path: str = None):
+    if socket_path is not None:
+        return UnixHTTPConnection(socket_path)
+    parsed = urllib.parse.urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port or 80)
+
+
+def request(connection, method: str, path: str, body: dict = None):
+    """
+    Returns the status and the decoded body
+    """
+    headers = {}
+    encoded = None
+    if body is not None:
+        encoded = json.dumps(body).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+
+    connection.request(method, path, body=encoded, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.read().decode("utf-8")
+
+
+def translate(
+    connection, text: str, output_format: str = "plantuml", document_id: str = None
+) -> str:
+    body = {"text": text, "format": output_format}
+    if document_id is not None:
+        body["document"] = document_id
+    status, body = request(connection, "POST", "/translate", body)
+    if status != 200:
+        raise Exception("Server answered {}: {}".format(status, body))
+    return body
+
+
+if __name__ == "__main__":
+    connection = connect(URL, SOCKET_PATH)
+
+    try:
+        if CHECK is not None:
+            method = "POST" if CHECK == "rules/reload" else "GET"
+            status, body = request(connection, method, "/" + CHECK)
+            print(body)
+            exit(0 if status == 200 else 1)
+
+        output_format = "json" if AS_JSON else "plantuml"
+        result = translate(connection, ARGS[0], output_format, DOCUMENT_ID)
+    except ConnectionError as error:
+        print("Cannot reach the server: {}".format(error), file=sys.stderr)
+        exit(1)
+
+    # same default output as translate.py
+    if OUT_PATH is None:
+        script_path = os.path.dirname(os.path.realpath(__file__))
+        OUT_PATH = os.path.join(script_path, "out.json" if AS_JSON else "out.plantuml")
+
+    with open(OUT_PATH, "w") as out:
+        out.write(result)
+
+    print(result)
+    print("Saved to {}".format(OUT_PATH))
@@ -0,0 +1,295 @@
+"""
+Content-addressed cache of the pipeline stages
+
+Each entry is keyed by a hash of the stage, its input and a fingerprint of the code,
+rules and models that produced it. Changing any of those starts a new set of keys, and
+the old entries are eventually evicted. Entries live in one SQLite file, bounded in size
+with least-recently-used eviction.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from importlib import metadata
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# what the cached results depend on, relative to the repository root
+FINGERPRINTED_FILES = [
+    "extraction/nlp_patterns.py",
+    "extraction/parse.py",
+    "extraction/rules.json",
+    "extraction/multiplicities.json",
+    "extraction/preprocess.py",
+    "extraction/assemble.py",
+    "extraction/pipelines.py",
+    "extraction/incremental.py",
+    "extraction/utils/uml.py",
+    "classification/predict_kind.py",
+    "classification/bernoulliNB.pickle",
+    "classification/tfidf.vec",
+    "translate.py",
+]
+FINGERPRINTED_PACKAGES = ["spacy", "en_core_web_sm", "coreferee", "scikit-learn"]
+
+# seconds the access time of an entry may lag before a hit writes it again, so most
+# hits only read
+ACCESS_RESOLUTION = 60
+
+_fingerprint = None
+
+
+def version_fingerprint() -> str:
+    """
+    Hash of the files and package versions the pipeline results depend on
+    """
+    global _fingerprint
+    if _fingerprint is not None:
+        return _fingerprint
+
+    digest = hashlib.sha256()
+    for relative_path in FINGERPRINTED_FILES:
+        digest.update(relative_path.encode("utf-8"))
+        path = os.path.join(ROOT, relative_path)
+        if os.path.isfile(path):
+            with open(path, "rb") as fingerprinted:
+                digest.update(fingerprinted.read())
+
+    for package in FINGERPRINTED_PACKAGES:
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = "missing"
+        digest.update(f"{package}=={version}".encode("utf-8"))
+
+    _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+class StageCache:
+    """
+    See the module docstring. Safe to share between threads. Forked processes open their
+    own connection to the same file.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 512 * 2**20, fingerprint: str = None
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint or version_fingerprint()
+
+        # stage, count
+        self.hits = Counter()
+        self.misses = Counter()
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+
+    def connection(self) -> sqlite3.Connection:
+        # connections must not cross a fork
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            # the total size of the entries, kept up to date by put and _evict
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    bytes INTEGER NOT NULL
+                )"""
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO meta SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+            )
+
+            self._connection = connection
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def key(self, stage: str, *parts: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode("utf-8"))
+        digest.update(stage.encode("utf-8"))
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(str(part).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, stage: str, *parts: str):
+        """
+        Returns (found, value). The value may be None, e.g. a sentence without fragment.
+        """
+        key = self.key(stage, *parts)
+        with self._lock:
+            connection = self.connection()
+            row = connection.execute(
+                "SELECT value, accessed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses[stage] += 1
+                return False, None
+
+            now = time.time()
+            if now - row[1] > ACCESS_RESOLUTION:
+                connection.execute(
+                    "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+                )
+            self.hits[stage] += 1
+
+        return True, pickle.loads(row[0])
+
+    def peek(self, stage: str, *parts: str):
+        """
+        get without counting a hit or a miss, nor touching the entry
+        """
+        key = self.key(stage, *parts)
+        with self._lock:
+            row = (
+                self.connection()
+                .execute("SELECT value FROM entries WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def put(self, stage: str, value, *parts: str):
+        self.put_many(stage, [(value, parts)])
+
+    def put_many(self, stage: str, entries: list[tuple]):
+        """
+        Caches (value, parts) pairs of a stage in one transaction
+        """
+        rows = [
+            (
+                self.key(stage, *parts),
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+            for value, parts in entries
+        ]
+        if len(rows) == 0:
+            return
+
+        with self._lock:
+            connection = self.connection()
+            # other processes write to the file too, the total is updated in the same
+            # transaction as the entries
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                added = 0
+                for key, blob in rows:
+                    previous = connection.execute(
+                        "SELECT size FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    connection.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                        (key, stage, blob, len(blob), now),
+                    )
+                    added += len(blob) - (previous[0] if previous else 0)
+
+                connection.execute("UPDATE meta SET bytes = bytes + ?", (added,))
+                total = self._total()
+                if total > self.max_bytes:
+                    self._evict(total)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def cached(self, stage: str, compute, *parts: str):
+        """
+        The cached value of the stage, or compute() which is then cached
+        """
+        found, value = self.get(stage, *parts)
+        if found:
+            return value
+        value = compute()
+        self.put(stage, value, *parts)
+        return value
+
+    def _total(self) -> int:
+        return self.connection().execute("SELECT bytes FROM meta").fetchone()[0]
+
+    def _evict(self, total: int):
+        """
+        Removes the least recently used entries until the cache is 90% of its maximum
+        """
+        connection = self.connection()
+        target = self.max_bytes * 0.9
+        freed = 0
+        evicted = []
+        oldest_first = connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        )
+        for key, size in oldest_first:
+            if total - freed <= target:
+                break
+            evicted.append((key,))
+            freed += size
+        oldest_first.close()
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        connection.execute("UPDATE meta SET bytes = bytes - ?", (freed,))
+
+    def take_counters(self):
+        """
+        Returns the hit and miss counters and resets them, see merge_counters
+        """
+        with self._lock:
+            counters = (self.hits, self.misses)
+            self.hits = Counter()
+            self.misses = Counter()
+        return counters
+
+    def merge_counters(self, counters):
+        """
+        Adds the counters taken in another process
+        """
+        hits, misses = counters
+        with self._lock:
+            self.hits.update(hits)
+            self.misses.update(misses)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stages = sorted(set(self.hits) | set(self.misses))
+            return {
+                "path": self.path,
+                "bytes": self._total(),
+                "max bytes": self.max_bytes,
+                "stages": {
+                    stage: {"hits": self.hits[stage], "misses": self.misses[stage]}
+                    for stage in stages
+                },
+            }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
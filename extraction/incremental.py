@@ -0,0 +1,264 @@
+"""
+Incremental translation of a document that is edited between runs
+
+The text is compared with the previous version to find the edited characters. Coref
+runs again only on the sentences around the edit, and only the sentences whose
+resolved text changed are classified and extracted. The model keeps a count of the
+fragments behind each class, attribute and association, so the fragments of the old
+sentences are retracted and those of the new sentences added without assembling the
+whole document again.
+"""
+import bisect
+from collections import Counter
+
+from .utils import uml
+from . import pipelines, trace
+from .preprocess import resolve_coref_sentences
+
+# sentences on each side of an edit that go through coref again, for the antecedents
+# of the edited sentences and the pronouns that may refer to them
+COREF_CONTEXT = 3
+
+
+class IncrementalModel:
+    """
+    The union of the fragments. Every class, attribute and association counts the
+    fragments it comes from and disappears when the last one is retracted.
+
+    Unlike assemble, the attributes of a class are the union of its fragments, and an
+    attribute named like a class becomes an association whatever the order of the
+    sentences.
+    """
+
+    def __init__(self) -> None:
+        self.classes = Counter()  # name
+        self.attributes = Counter()  # class name, attribute name, type
+        self.associations = Counter()  # source, destination, name, multiplicity
+
+    @staticmethod
+    def facts(fragment: uml.UML):
+        classes = []
+        attributes = []
+        associations = []
+        for uml_class in fragment.classes:
+            classes.append(uml_class.name)
+            for name, attribute_type in uml_class.attributes:
+                attributes.append((uml_class.name, name, attribute_type))
+            for destination, multiplicity, name in uml_class.associations:
+                classes.append(destination.name)
+                associations.append(
+                    (uml_class.name, destination.name, name, multiplicity)
+                )
+        return classes, attributes, associations
+
+    def add(self, fragment: uml.UML):
+        classes, attributes, associations = IncrementalModel.facts(fragment)
+        self.classes.update(classes)
+        self.attributes.update(attributes)
+        self.associations.update(associations)
+
+    def retract(self, fragment: uml.UML):
+        classes, attributes, associations = IncrementalModel.facts(fragment)
+        for counter, facts in [
+            (self.classes, classes),
+            (self.attributes, attributes),
+            (self.associations, associations),
+        ]:
+            for fact in facts:
+                counter[fact] -= 1
+                if counter[fact] <= 0:
+                    del counter[fact]
+
+    def to_uml(self, package_name: str) -> uml.UML:
+        if len(self.classes) == 0:
+            return uml.UML("Nothing")
+
+        # sorted, so that the model does not depend on the order of the edits
+        model = uml.UML(package_name)
+        classes = {name: uml.UMLClass(name, "class") for name in sorted(self.classes)}
+        lowercase_names = {name.lower(): name for name in classes}
+
+        # source, destination, name: multiplicity
+        relations = {}
+        for source, destination, name, multiplicity in sorted(self.associations):
+            key = (source, destination, name)
+            # multiplicity takes over no multiplicity, like remove_duplicates
+            if relations.get(key, "") == "":
+                relations[key] = multiplicity
+
+        for class_name, name, attribute_type in sorted(self.attributes, key=str):
+            promoted = lowercase_names.get(name.lower())
+            if promoted is not None and promoted != class_name:
+                # same as case 1 of indirect_matching_class
+                relations.setdefault(
+                    (class_name, promoted, name[0].lower() + name[1:]), ""
+                )
+                continue
+            classes[class_name].attribute(name, attribute_type)
+
+        for (source, destination, name), multiplicity in relations.items():
+            classes[source].association(classes[destination], multiplicity, name)
+
+        model.classes = list(classes.values())
+        return model
+
+
+class SentenceRecord:
+    __slots__ = ("start", "end", "text", "fragment")
+
+    def __init__(self, start: int, end: int, text: str, fragment: uml.UML) -> None:
+        # characters of the sentence in the document
+        self.start = start
+        self.end = end
+        # after coref
+        self.text = text
+        self.fragment = fragment
+
+
+def common_prefix_length(old: str, new: str) -> int:
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(old: str, new: str, prefix: int) -> int:
+    # the suffix cannot overlap the prefix
+    low, high = 0, min(len(old), len(new)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle :] == new[len(new) - middle :]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalDocument:
+    """
+    One document translated again after every edit, see the module docstring.
+
+    The translator classifies and extracts the sentences, like
+    Translator.extract_sentences of translate.py. It is not pickled with the document.
+    """
+
+    def __init__(self, translator, context: int = COREF_CONTEXT) -> None:
+        self.translator = translator
+        self.context = context
+
+        self.text = ""
+        self.sentences: list[SentenceRecord] = []
+        self.model = IncrementalModel()
+
+        # what the last update did
+        self.last_update = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["translator"] = None
+        return state
+
+    def update(self, text: str) -> uml.UML:
+        """
+        Translate the new version of the document
+        """
+        old = self.text
+        prefix = common_prefix_length(old, text)
+        suffix = common_suffix_length(old, text, prefix)
+        old_end = len(old) - suffix  # end of the edit in the old text
+        shift = len(text) - len(old)
+
+        if old == text and len(self.sentences) > 0:
+            self.last_update = {"sentences": len(self.sentences), "extracted": 0}
+            return self.to_uml()
+
+        # the sentences touched by the edit, first to last included
+        first = bisect.bisect_left(self.sentences, prefix, key=lambda s: s.end)
+        last = bisect.bisect_right(self.sentences, old_end, key=lambda s: s.start) - 1
+
+        # with the context around them
+        low = max(0, first - self.context)
+        high = min(len(self.sentences) - 1, last + self.context)
+
+        start = prefix
+        if low < len(self.sentences):
+            start = min(start, self.sentences[low].start)
+        end = old_end
+        if high >= 0:
+            end = max(end, self.sentences[high].end)
+
+        with trace.span("coref", characters=end + shift - start):
+            doc = pipelines.get("coref")(text[start : end + shift])
+        resolved = list(zip(resolve_coref_sentences(doc).values(), doc.sents))
+
+        # the sentences before the edit keep their fragment, unless the edit changed
+        # where they end
+        lead_end = self.sentences[first - 1].end if low < first else start
+        window = [
+            (sentence, span)
+            for sentence, span in resolved
+            if start + span.end_char > lead_end
+        ]
+        if len(window) > 0 and start + window[0][1].start_char < lead_end:
+            window = resolved
+            first = low
+
+        replaced = self.sentences[first : high + 1]
+        reusable: dict[str, list[SentenceRecord]] = {}
+        for record in replaced:
+            reusable.setdefault(record.text, []).append(record)
+
+        records = []
+        to_extract = []
+        for (sentence, coref_span), span in window:
+            sentence_start = start + span.start_char
+            sentence_end = start + span.end_char
+            if len(reusable.get(sentence, [])) > 0:
+                fragment = reusable[sentence].pop().fragment
+            else:
+                fragment = None
+                to_extract.append((len(records), (sentence, coref_span)))
+            records.append(
+                SentenceRecord(sentence_start, sentence_end, sentence, fragment)
+            )
+
+        fragments = self.translator.extract_sentences(
+            [sentence for _, sentence in to_extract]
+        )
+
+        with trace.span("assemble", fragments=len(fragments)):
+            for records_left in reusable.values():
+                for record in records_left:
+                    if record.fragment is not None:
+                        self.model.retract(record.fragment)
+            for (index, _), fragment in zip(to_extract, fragments):
+                records[index].fragment = fragment
+                if fragment is not None:
+                    self.model.add(fragment)
+
+        for record in self.sentences[high + 1 :]:
+            record.start += shift
+            record.end += shift
+        self.sentences[first : high + 1] = records
+        self.text = text
+
+        self.last_update = {
+            "sentences": len(self.sentences),
+            "coref sentences": len(resolved),
+            "extracted": len(to_extract),
+            "retracted": sum(len(left) for left in reusable.values()),
+        }
+        return self.to_uml()
+
+    def to_uml(self) -> uml.UML:
+        # the package is named after the first fragment, like assemble does
+        package_name = "Nothing"
+        for record in self.sentences:
+            if record.fragment is not None:
+                package_name = record.fragment.package_name
+                break
+        return self.model.to_uml(package_name)
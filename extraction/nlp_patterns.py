@@ -1,137 +1,589 @@
 """
 Extract features for one class
 """
+import json
+import os
+import threading
+import time
+from collections import Counter
 from sys import stderr
 from typing import Callable
 from .utils import uml
+from . import pipelines, trace
 import spacy
 from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
 
-# Helper class to get the uml result
-class BuiltUML:
-    def __init__(self, sentence: str, kind: str) -> None:
+KINDS = ["class", "rel"]
+
+
+class Rule:
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        priority: int,
+        pattern: list[list[dict]],
+        action: Callable[[dict, "BuiltUML"], uml.UML],
+    ) -> None:
         self.kind = kind
+        self.name = name
+        # lower is tried first
+        self.priority = priority
+        self.pattern = pattern
+        self.action = action
 
-        # load spacy
-        self.nlp_model = spacy.load("en_core_web_sm")
-        self.sentence = sentence
-        self.spacy_doc = self.nlp_model(sentence)
 
-        # Start parsing
-        self.matcher = spacy.matcher.DependencyMatcher(self.nlp_model.vocab)
+class RuleRegistry:
+    """
+    Every extraction rule with its kind and priority.
 
-        # resulting UML
-        self.uml_result: dict[str, uml.UML] = {}
+    Names and priorities are checked when a rule is registered, so that each kind has
+    exactly one order in which its rules are tried.
+    """
 
-    def add_rule(
+    def __init__(self) -> None:
+        # kind, rule name, rule
+        self.rules: dict[str, dict[str, Rule]] = {kind: {} for kind in KINDS}
+
+    def register(
         self,
-        pattern_name: str,
+        kind: str,
+        name: str,
+        priority: int,
         pattern: list[list[dict]],
-        matched_action: Callable[[dict, "BuiltUML"], uml.UML],
+        action: Callable[[dict, "BuiltUML"], uml.UML],
+    ) -> Rule:
+        if kind not in self.rules:
+            raise Exception("Unknown fragment kind:{}".format(kind))
+        if name in self.rules[kind]:
+            raise Exception("Rule already registered: {} {}".format(kind, name))
+        if not callable(action):
+            raise Exception("Action of {} {} is not callable".format(kind, name))
+        for rule in self.rules[kind].values():
+            if rule.priority == priority:
+                raise Exception(
+                    "{} rules {} and {} have the same priority {}".format(
+                        kind, rule.name, name, priority
+                    )
+                )
+
+        rule = Rule(kind, name, priority, pattern, action)
+        self.rules[kind][name] = rule
+        return rule
+
+    def rules_of(self, kind: str) -> list[Rule]:
+        """
+        The rules of a kind, from the highest priority
+        """
+        if kind not in self.rules:
+            raise Exception("Unknown fragment kind:{}".format(kind))
+        return sorted(self.rules[kind].values(), key=lambda rule: rule.priority)
+
+    def rule_set(
+        self, kind: str, vocab, multiplicity_conversion: dict[str, str] = None
+    ) -> "RuleSet":
+        """
+        The frozen rule set of a kind
+        """
+        rules = self.rules_of(kind)
+        if len(rules) == 0:
+            raise Exception("No {} rule registered".format(kind))
+
+        rule_set = RuleSet(kind, vocab, multiplicity_conversion)
+        for rule in rules:
+            rule_set.add_rule(rule.name, rule.pattern, rule.action, rule.priority)
+        return rule_set.freeze()
+
+    @staticmethod
+    def from_definitions(definitions: list[dict]) -> "RuleRegistry":
+        """
+        Registry of the rules of a rule file, see load_rule_definitions
+        """
+        registry = RuleRegistry()
+        for definition in definitions:
+            registry.register(
+                definition["kind"],
+                definition["name"],
+                definition["priority"],
+                definition["pattern"],
+                globals()[definition["builder"]],
+            )
+        return registry
+
+
+# Rule files
+# keys of a rule definition
+RULE_KEYS = ["kind", "name", "priority", "builder", "pattern"]
+OPTIONAL_RULE_KEYS = ["description"]
+
+# operators of the dependency matcher
+REL_OPS = [
+    "<",
+    ">",
+    "<<",
+    ">>",
+    ".",
+    ".*",
+    ";",
+    ";*",
+    "$+",
+    "$-",
+    "$++",
+    "$--",
+    ">+",
+    ">-",
+    ">++",
+    ">--",
+    "<+",
+    "<-",
+    "<++",
+    "<--",
+]
+
+
+def load_rule_definitions(path: str) -> list[dict]:
+    """
+    The rules of a JSON rule file, validated before anything is compiled
+    """
+    with open(path) as rules_file:
+        try:
+            content = json.load(rules_file)
+        except ValueError as error:
+            raise Exception("Rule file is not JSON: {} {}".format(path, error))
+
+    if not isinstance(content, dict) or not isinstance(content.get("rules"), list):
+        raise Exception('Rule file without a "rules" list: {}'.format(path))
+
+    for definition in content["rules"]:
+        validate_rule_definition(definition)
+    return content["rules"]
+
+
+def validate_rule_definition(definition: dict):
+    """
+    Raises if the definition cannot be registered and compiled. Names and priorities
+    are checked by RuleRegistry.register.
+    """
+    if not isinstance(definition, dict):
+        raise Exception("Rule is not an object: {}".format(definition))
+
+    name = definition.get("name")
+    for key in RULE_KEYS:
+        if key not in definition:
+            raise Exception("Rule {} has no {}".format(name, key))
+    for key in definition:
+        if key not in RULE_KEYS and key not in OPTIONAL_RULE_KEYS:
+            raise Exception("Rule {} has an unknown key: {}".format(name, key))
+
+    if not isinstance(name, str) or name == "":
+        raise Exception("Rule name is not a string: {}".format(name))
+    if definition["kind"] not in KINDS:
+        raise Exception("Unknown fragment kind:{}".format(definition["kind"]))
+    if type(definition["priority"]) is not int:
+        raise Exception("Priority of {} is not an integer".format(name))
+
+    builder = definition["builder"]
+    if not (
+        isinstance(builder, str)
+        and builder.startswith("process_")
+        and callable(globals().get(builder))
     ):
-        def store_uml_callback(matcher, doc, i, matches):
+        raise Exception("Unknown builder of {}: {}".format(name, builder))
+
+    pattern = definition["pattern"]
+    if not isinstance(pattern, list) or len(pattern) == 0:
+        raise Exception("Pattern of {} is not a list of patterns".format(name))
+    for alternative in pattern:
+        validate_pattern(name, alternative)
+        # the builder reads the tokens by the ids of the first pattern
+        if [token["RIGHT_ID"] for token in alternative] != [
+            token["RIGHT_ID"] for token in pattern[0]
+        ]:
+            raise Exception(
+                "Patterns of {} do not have the same token ids".format(name)
+            )
 
-            _, token_ids = matches[i]
+    # anything else spaCy would refuse
+    try:
+        matcher = spacy.matcher.DependencyMatcher(Vocab(), validate=True)
+        matcher.add(name, pattern)
+    except ValueError as error:
+        raise Exception("Pattern of {} is not valid: {}".format(name, error))
+
+
+def validate_pattern(name: str, pattern: list[dict]):
+    if not isinstance(pattern, list) or len(pattern) == 0:
+        raise Exception("Pattern of {} is empty".format(name))
+
+    right_ids = set()
+    for position, token in enumerate(pattern):
+        if not isinstance(token, dict):
+            raise Exception("Token of {} is not an object: {}".format(name, token))
+
+        # the anchor token only has an id and attributes
+        keys = ["RIGHT_ID", "RIGHT_ATTRS"]
+        if position > 0:
+            keys = ["LEFT_ID", "REL_OP"] + keys
+        if sorted(token) != sorted(keys):
+            raise Exception(
+                "Token {} of {} must have exactly {}".format(position, name, keys)
+            )
 
-            current_semantics = BuiltUML.get_semantics(doc, token_ids, pattern[0])
+        if not isinstance(token["RIGHT_ATTRS"], dict):
+            raise Exception("Attributes of {} {} are not an object".format(name, token))
+        if token["RIGHT_ID"] in right_ids:
+            raise Exception(
+                "Token id used twice in {}: {}".format(name, token["RIGHT_ID"])
+            )
+        if position > 0:
+            if token["LEFT_ID"] not in right_ids:
+                raise Exception(
+                    "Token of {} refers to an unknown id: {}".format(
+                        name, token["LEFT_ID"]
+                    )
+                )
+            if token["REL_OP"] not in REL_OPS:
+                raise Exception(
+                    "Unknown operator in {}: {}".format(name, token["REL_OP"])
+                )
+        right_ids.add(token["RIGHT_ID"])
 
-            result = matched_action(current_semantics, self)
-            if result is not None:
-                self.uml_result[pattern_name] = result
 
-        self.matcher.add(pattern_name, pattern, on_match=store_uml_callback)
+# token attributes that the anchors of a pattern are made of
+ANCHOR_ATTRIBUTES = ["LEMMA", "POS", "DEP"]
 
-    def parse(self, verbose: bool = True):
-        # clear previous results
-        self.uml_result = {}
 
-        matched_results = self.matcher(self.spacy_doc)
+def pattern_anchors(pattern: list[dict]) -> list[frozenset]:
+    """
+    What a doc needs for the pattern to match: for each constrained attribute of each
+    token of the pattern, the (attribute, value) pairs of which one must be in the doc.
+    Lemmas come first, they are the most selective.
+    """
+    anchors = []
+    for attribute in ANCHOR_ATTRIBUTES:
+        for token in pattern:
+            value = token.get("RIGHT_ATTRS", {}).get(attribute)
+            if isinstance(value, str):
+                anchors.append(frozenset([(attribute, value)]))
+            elif isinstance(value, dict) and "IN" in value:
+                anchors.append(frozenset((attribute, v) for v in value["IN"]))
+    return anchors
+
+
+def doc_anchors(doc) -> set:
+    """
+    The (attribute, value) pairs of the tokens of a doc, see pattern_anchors
+    """
+    anchors = set()
+    for token in doc:
+        anchors.add(("LEMMA", token.lemma_))
+        anchors.add(("POS", token.pos_))
+        anchors.add(("DEP", token.dep_))
+    return anchors
 
-        if verbose:
-            # Number of matches
-            print(f"Matches: {len(matched_results)}")
-            for match_id, _ in matched_results:
-                string_id = self.nlp_model.vocab.strings[
-                    match_id
-                ]  # Get string representation
-                print(string_id)
 
-        return self.select_parsed_result()
+class RuleSet:
+    """
+    The rules of one kind of fragment, each compiled into its own dependency matcher.
 
-    def select_parsed_result(self):
-        """
-        Combine all the results from the different rules together to form a fragment
-        """
-        if len(self.uml_result) > 0:
-            found_umls: dict[str, uml.UML] = {}
-            for key, value in self.uml_result.items():
-                if value is None:
-                    continue
-                found_umls[key] = value
+    Once frozen, no rule can be added and the same rule set is shared by every BuiltUML
+    of that kind. apply tries the rules from the highest priority and stops at the first
+    one that builds a fragment. Rules without a priority come last, in the order they
+    were added.
 
-            if len(found_umls) == 1:
-                return list(found_umls.values())[0]
+    An inverted index from the anchors of the patterns (lemma, POS and dependency of
+    their tokens) to the rules skips the rules that cannot match a doc.
+    """
 
-            if self.kind == "class":
+    def __init__(
+        self, kind: str, vocab, multiplicity_conversion: dict[str, str] = None
+    ) -> None:
+        self.kind = kind
+        self.vocab = vocab
+
+        # pattern name, pattern, matcher, action and priority
+        self.patterns: dict[str, list[list[dict]]] = {}
+        self.matchers: dict[str, spacy.matcher.DependencyMatcher] = {}
+        self.actions: dict[str, Callable[[dict, "BuiltUML"], uml.UML]] = {}
+        self.priorities: dict[str, int] = {}
+
+        # pattern name, anchors all needed by the pattern
+        self.anchors: dict[str, list[frozenset]] = {}
+        # (attribute, value), names of the patterns anchored on it
+        self.index: dict[tuple, set[str]] = {}
+        # names of the patterns without anchor, always tried
+        self.unanchored: set[str] = set()
+
+        self.frozen = False
+        # pattern names from the highest priority
+        self.order: list[str] = []
+
+        # pattern name, counts of "evaluated", "skipped" by the index and "not reached"
+        # after a rule of higher priority built the fragment, and the other stats of
+        # report
+        self.stats: dict[str, Counter] = {}
+        self._stats_lock = threading.Lock()
+
+        # multiplicity phrases, compiled on first use. None for multiplicities.json
+        self.multiplicity_conversion = multiplicity_conversion
+        self._multiplicities: "MultiplicityLexicon" = None
+        self._multiplicities_lock = threading.Lock()
+
+    @property
+    def multiplicities(self) -> "MultiplicityLexicon":
+        if self._multiplicities is None:
+            with self._multiplicities_lock:
+                if self._multiplicities is None:
+                    self._multiplicities = MultiplicityLexicon(
+                        pipelines.get("extraction"), self.multiplicity_conversion
+                    )
+        return self._multiplicities
 
-                if "simple copula" in found_umls:
-                    return found_umls["simple copula"]
-                elif "there is or exists" in found_umls:
-                    return found_umls["expletive"]
+    def add_rule(
+        self,
+        pattern_name: str,
+        pattern: list[list[dict]],
+        matched_action: Callable[[dict, "BuiltUML"], uml.UML],
+        priority: int = None,
+    ):
+        if self.frozen:
+            raise Exception(
+                "Cannot add {} to the frozen {} rules".format(pattern_name, self.kind)
+            )
+        if pattern_name in self.patterns:
+            raise Exception("Rule already exists: {}".format(pattern_name))
+
+        matcher = spacy.matcher.DependencyMatcher(self.vocab)
+        matcher.add(pattern_name, pattern)
+        self.matchers[pattern_name] = matcher
+        self.patterns[pattern_name] = pattern
+        self.actions[pattern_name] = matched_action
+        if priority is not None:
+            self.priorities[pattern_name] = priority
+        self.order = sorted(
+            self.patterns,
+            key=lambda name: (
+                name not in self.priorities,
+                self.priorities.get(name, 0),
+            ),
+        )
+        self.stats[pattern_name] = Counter()
+
+        # the anchors every alternative pattern of the rule has in common
+        anchors = set(pattern_anchors(pattern[0]))
+        for alternative in pattern[1:]:
+            anchors &= set(pattern_anchors(alternative))
+        self.anchors[pattern_name] = [
+            anchor for anchor in pattern_anchors(pattern[0]) if anchor in anchors
+        ]
+
+        if len(self.anchors[pattern_name]) == 0:
+            self.unanchored.add(pattern_name)
+        else:
+            # indexed on its most selective anchor, the others are checked after
+            for anchor in self.anchors[pattern_name][0]:
+                self.index.setdefault(anchor, set()).add(pattern_name)
 
-                elif "3 component and clause" in found_umls:
-                    return found_umls["3 component and clause"]
+    def freeze(self):
+        self.frozen = True
+        return self
 
-                elif "2 component and clause" in found_umls:
-                    return found_umls["2 component and clause"]
+    def candidates(self, doc) -> set[str]:
+        """
+        Names of the rules whose anchors are all in the doc
+        """
+        present = doc_anchors(doc)
 
-                elif "to have" in found_umls:
-                    return found_umls["to have"]
+        candidates = set(self.unanchored)
+        for anchor in present:
+            candidates.update(self.index.get(anchor, ()))
 
-                elif "class named" in found_umls:
-                    return found_umls["class named"]
+        return {
+            name
+            for name in candidates
+            if all(not anchor.isdisjoint(present) for anchor in self.anchors[name])
+        }
 
-                elif "compound" in found_umls:
-                    return found_umls["compound"]
+    def apply(self, context: "MatchContext", verbose: bool = False):
+        """
+        Match the rules on the doc of the context from the highest priority, and build
+        the fragment of the first one that gives one. The results are kept in the
+        context, so a frozen rule set can serve many threads.
+        """
+        context.uml_result = {}
+        context.rule_set = self
+        candidates = self.candidates(context.spacy_doc)
+
+        # pattern name, stat, amount. Counted even if a builder raises.
+        counts = []
+        try:
+            return self.apply_rules(context, candidates, counts, verbose)
+        finally:
+            self.add_stats(counts)
+
+    def apply_rules(
+        self,
+        context: "MatchContext",
+        candidates: set[str],
+        counts: list[tuple[str, str, int]],
+        verbose: bool,
+    ):
+        result = None
+        for pattern_name in self.order:
+            if result is not None:
+                counts.append((pattern_name, "not reached", 1))
+                continue
+            if pattern_name not in candidates:
+                counts.append((pattern_name, "skipped", 1))
+                continue
+            counts.append((pattern_name, "evaluated", 1))
+
+            start = time.perf_counter_ns()
+            with trace.span("match", rule=pattern_name):
+                matches = self.matchers[pattern_name](context.spacy_doc)
+            counts.append((pattern_name, "match ns", time.perf_counter_ns() - start))
+            counts.append((pattern_name, "matches", len(matches)))
+
+            if verbose and len(matches) > 0:
+                print(f"Matches: {len(matches)} {pattern_name}")
+
+            # the last match of a rule used to overwrite the earlier ones
+            for _, token_ids in reversed(matches):
+                start = time.perf_counter_ns()
+                try:
+                    with trace.span("rule", rule=pattern_name):
+                        current_semantics = BuiltUML.get_semantics(
+                            context.spacy_doc, token_ids, self.patterns[pattern_name][0]
+                        )
+                        result = self.actions[pattern_name](current_semantics, context)
+                except Exception:
+                    counts.append((pattern_name, "exceptions", 1))
+                    raise
+                finally:
+                    counts.append(
+                        (pattern_name, "build ns", time.perf_counter_ns() - start)
+                    )
+                    counts.append((pattern_name, "builds", 1))
+
+                if result is not None:
+                    counts.append((pattern_name, "wins", 1))
+                    context.uml_result[pattern_name] = result
+                    break
+
+        return result
+
+    def add_stats(self, counts: list[tuple[str, str, int]]):
+        with self._stats_lock:
+            for pattern_name, stat, amount in counts:
+                self.stats[pattern_name][stat] += amount
+
+    def report(self) -> list[dict]:
+        """
+        Per rule: the sentences it was evaluated on, skipped by the index or not reached,
+        the matches found, the calls of its builder, the fragments it won with, the
+        exceptions of the builder, and the time spent matching and building
+        """
+        with self._stats_lock:
+            rows = []
+            for name in self.order:
+                stats = self.stats[name]
+                rows.append(
+                    {
+                        "kind": self.kind,
+                        "rule": name,
+                        "priority": self.priorities.get(name),
+                        "evaluated": stats["evaluated"],
+                        "skipped": stats["skipped"],
+                        "not reached": stats["not reached"],
+                        "matches": stats["matches"],
+                        "builds": stats["builds"],
+                        "wins": stats["wins"],
+                        "exceptions": stats["exceptions"],
+                        "match ms": stats["match ns"] / 1e6,
+                        "build ms": stats["build ns"] / 1e6,
+                    }
+                )
+            return rows
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for stats in self.stats.values():
+                stats.clear()
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class MatchContext:
+    """
+    The sentence being extracted, as seen by the actions of the rules. A new one is
+    made for every call, unlike BuiltUML which keeps the last sentence.
+    """
 
-                elif "compound class explicit" in found_umls:
-                    return found_umls["compound class explicit"]
+    def __init__(self, doc, kind: str, nlp_model=None) -> None:
+        self.kind = kind
+        self.nlp_model = nlp_model or pipelines.get("extraction")
+        self.sentence = doc.text
+        self.spacy_doc = doc
 
-                elif "component of package" in found_umls:
-                    return found_umls["component of package"]
+        # set by the rule set that matches the sentence
+        self.rule_set: RuleSet = None
 
-            elif self.kind == "rel":
+        # pattern name, result of its action
+        self.uml_result: dict[str, uml.UML] = {}
 
-                if "to have with multiplicity" in found_umls:
-                    return found_umls["to have with multiplicity"]
 
-                elif "to have" in found_umls:
-                    return found_umls["to have"]
+# Helper class to get the uml result
+class BuiltUML:
+    def __init__(self, sentence: str, kind: str, rule_set: RuleSet = None) -> None:
+        self.kind = kind
 
-                elif "composed" in found_umls:  # this might be changed to gain priority
-                    return found_umls["composed"]
+        # shared spacy pipeline
+        self.nlp_model = pipelines.get("extraction")
+        self.sentence = sentence
+        self.spacy_doc = self.nlp_model(sentence)
 
-                elif "noun with" in found_umls:
-                    return found_umls["noun with"]
+        # rules, possibly compiled once and shared
+        if rule_set is None:
+            rule_set = RuleSet(kind, self.nlp_model.vocab)
+        self.rule_set = rule_set
 
-                elif "passive voice" in found_umls:
-                    return found_umls["passive voice"]
+        # resulting UML
+        self.uml_result: dict[str, uml.UML] = {}
 
-                elif "active voice" in found_umls:
-                    return found_umls["active voice"]
+    def add_rule(
+        self,
+        pattern_name: str,
+        pattern: list[list[dict]],
+        matched_action: Callable[[dict, "BuiltUML"], uml.UML],
+        priority: int = None,
+    ):
+        self.rule_set.add_rule(pattern_name, pattern, matched_action, priority)
 
-                elif "copula rel" in found_umls:
-                    return found_umls["copula rel"]
+    def parse(self, verbose: bool = True):
+        return self.rule_set.apply(self, verbose)
 
-        else:
-            return None
+    def select_parsed_result(self):
+        """
+        Combine all the results from the different rules together to form a fragment
+        """
+        return select_parsed_result(self.kind, self.uml_result)
 
     def set_sentence(self, sentence: str):
         self.sentence = sentence
         self.spacy_doc = self.nlp_model(sentence)
 
+    def set_doc(self, doc):
+        """
+        Use a sentence that was already parsed, e.g. by nlp.pipe
+        """
+        self.sentence = doc.text
+        self.spacy_doc = doc
+
     def clear_rules(self):
-        self.matcher = spacy.matcher.DependencyMatcher(self.nlp_model.vocab)
+        self.rule_set = RuleSet(self.kind, self.nlp_model.vocab)
 
     def clear_result(self):
         self.uml_result = {}
@@ -154,32 +606,22 @@ class BuiltUML:
         return current_semantics
 
 
+def select_parsed_result(kind: str, uml_result: dict):
+    """
+    The fragment of the rule with the highest priority among the results. RuleSet.apply
+    keeps only that one.
+    """
+    for value in uml_result.values():
+        if value is not None:
+            return value
+    return None
+
+
 # ------------------------------------------
 # Class pattern
+# The patterns are in rules.json, with the name of the builder of each
 
 # copula: The ... is a class ...
-copula_class = [
-    # Pattern is: "The (subject) is a class ..."
-    # Extracted info: A class with no attribute
-    # anchor token: verb "to be"
-    {"RIGHT_ID": "copula", "RIGHT_ATTRS": {"LEMMA": "be"}},
-    # subject of the verb
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    # object of the verb
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "attr", "LEMMA": "class"},
-    },
-]
-
-# Process a copula match
 def process_copula_class(current_semantics: dict, build_in_progress: BuiltUML):
     """
     current_semantics is a dictionary where the keys are the left-ids of the dep pattern
@@ -197,28 +639,92 @@ def process_copula_class(current_semantics: dict, build_in_progress: BuiltUML):
     return package
 
 
-def make_noun_pascal_case(current_semantics, build_in_progress: BuiltUML, noun: str):
+class NounChunkIndex:
+    """
+    The noun chunks of a doc with the class and attribute names they give, computed
+    once per doc. See noun_chunk_index.
+    """
+
+    __slots__ = ("chunks", "pascal_case", "camel_case")
+
+    def __init__(self, doc) -> None:
+        # start, end of each chunk
+        self.chunks: list[tuple[int, int]] = []
+        # index of the chunk root, name made of the chunk ("" if only stop words)
+        self.pascal_case: dict[int, str] = {}
+        self.camel_case: dict[int, str] = {}
+
+        for chunk in doc.noun_chunks:
+            self.chunks.append((chunk.start, chunk.end))
+            root = chunk.root.i
+            self.pascal_case[root] = self.pascal_case.get(root, "") + pascal_case_of(
+                chunk
+            )
+            self.camel_case[root] = self.camel_case.get(root, "") + camel_case_of(
+                chunk, self.camel_case.get(root, "") == ""
+            )
+
+
+def pascal_case_of(chunk) -> str:
+    class_name = ""
+    for token in chunk:
+        if token.is_stop:
+            continue
+        elif token.text == "exactly":
+            continue
+        else:
+            if token.text.isupper():  # acronym case
+                class_name += token.text
+                continue
+
+            if token == chunk.root:
+                # remove plurals
+                class_name += token.lemma_.capitalize()
+            else:
+                class_name += token.text.capitalize()
+    return class_name
+
+
+def camel_case_of(chunk, first: bool = True) -> str:
     class_name = ""
+    for word in chunk:
+        if word.is_stop:
+            continue
+
+        if word.is_upper:  # acronym
+            token = word.text
+        else:
+            token = word.lemma_
+
+        if first:
+            class_name += token
+            first = False
+            continue
+        class_name += token.capitalize()
+    return class_name
+
+
+Doc.set_extension("noun_chunk_index", default=None, force=True)
+
 
+def noun_chunk_index(doc) -> NounChunkIndex:
+    """
+    The noun chunk index of a doc, kept in doc._.noun_chunk_index. noun_chunks chunks the
+    doc again on every call, so the rules ask the index instead.
+    """
+    index = doc._.noun_chunk_index
+    if index is None:
+        index = NounChunkIndex(doc)
+        doc._.noun_chunk_index = index
+    return index
+
+
+def make_noun_pascal_case(current_semantics, build_in_progress: BuiltUML, noun: str):
     noun_token = build_in_progress.spacy_doc[current_semantics["positions"][noun]]
 
-    for chunk in build_in_progress.spacy_doc.noun_chunks:
-        if noun_token == chunk.root:
-            for token in chunk:
-                if token.is_stop:
-                    continue
-                elif token.text == "exactly":
-                    continue
-                else:
-                    if token.text.isupper():  # acronym case
-                        class_name += token.text
-                        continue
-
-                    if token == chunk.root:
-                        # remove plurals
-                        class_name += token.lemma_.capitalize()
-                    else:
-                        class_name += token.text.capitalize()
+    class_name = noun_chunk_index(build_in_progress.spacy_doc).pascal_case.get(
+        noun_token.i, ""
+    )
 
     # in case the spacy model's noun chunks are wrong!
     if class_name == "":
@@ -229,27 +735,6 @@ def make_noun_pascal_case(current_semantics, build_in_progress: BuiltUML, noun:
 
 
 # expletive: There is / exists ...
-expletive = [
-    # Pattern is: There is / exists (noun for class).
-    # Extracted info: An empty class with the name of the noun
-    {"RIGHT_ID": "copula", "RIGHT_ATTRS": {"LEMMA": {"IN": ["be", "exist"]}}},
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "expl"},
-    },
-    # object of the verb
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {
-            "DEP": {"IN": ["attr", "npadvmod", "dobj"]},
-            "POS": {"IN": ["NOUN", "PROPN"]},
-        },
-    },
-]
 
 
 def process_expletive(current_semantics: dict, build_in_progress: BuiltUML):
@@ -266,18 +751,6 @@ def process_expletive(current_semantics: dict, build_in_progress: BuiltUML):
 
 
 # general compound noun: The drawing interface format.
-compound = [
-    # Pattern is: (anything compound) (Proper Noun, can't be "class")
-    # Extracted info: An empty class with the noun as the name.
-    {
-        "RIGHT_ID": "noun",
-        "RIGHT_ATTRS": {
-            "POS": {"IN": ["PROPN", "NOUN"]},
-            "LEMMA": {"NOT_IN": ["class", "Class"]},
-            "DEP": "ROOT",
-        },
-    }
-]
 
 
 def process_compound(current_semantics: dict, build: BuiltUML):
@@ -297,24 +770,6 @@ def process_compound(current_semantics: dict, build: BuiltUML):
 
 
 # noun sentences with the class mention
-compound_class_explicit = [
-    # Pattern: (anything compound) class
-    # Extracted: Empty class with the name of the compound
-    {
-        "RIGHT_ID": "noun",
-        "RIGHT_ATTRS": {
-            "POS": {"IN": ["PROPN", "NOUN"]},
-            "LEMMA": {"IN": ["class", "Class"]},
-            "DEP": "ROOT",
-        },
-    },
-    {
-        "LEFT_ID": "noun",
-        "REL_OP": ">",
-        "RIGHT_ID": "complement",
-        "RIGHT_ATTRS": {"DEP": {"IN": ["amod", "compound"]}},
-    },
-]
 
 
 def process_compound_class_explicit(current_semantics: dict, build: BuiltUML):
@@ -326,11 +781,11 @@ def process_compound_class_explicit(current_semantics: dict, build: BuiltUML):
         current_semantics["positions"][current_semantics["noun"]]
     ]
 
-    chunks = list(build.spacy_doc.noun_chunks)
+    chunks = noun_chunk_index(build.spacy_doc).chunks
 
     if len(chunks) > 1:
         return None
-    chunk = chunks[0]
+    chunk = build.spacy_doc[chunks[0][0] : chunks[0][1]]
     if chunk.root != noun_token:
         return None
 
@@ -356,30 +811,6 @@ def process_compound_class_explicit(current_semantics: dict, build: BuiltUML):
 
 # to have. This pattern catches too many false positives and loses information that can be
 # extracted by more detailed patterns.
-class_to_have = [
-    # Pattern: (subject) has/contains/includes/comprise (object)
-    # Extracted info: Class with one untyped attribute
-    {
-        "RIGHT_ID": "have",
-        "RIGHT_ATTRS": {
-            "DEP": "ROOT",
-            "POS": "VERB",
-            "LEMMA": {"IN": ["have", "contain", "include", "comprise"]},
-        },
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-]
 
 
 def process_class_to_have(current_semantics: dict, build: BuiltUML):
@@ -398,62 +829,20 @@ def process_class_to_have(current_semantics: dict, build: BuiltUML):
 
 
 def make_noun_camel_case(current_semantics: dict, build: BuiltUML, noun: str):
-    class_name = ""
-
     noun_token = build.spacy_doc[current_semantics["positions"][noun]]
 
-    tokens: list[str] = []
+    class_name = noun_chunk_index(build.spacy_doc).camel_case.get(noun_token.i, "")
 
-    for chunk in build.spacy_doc.noun_chunks:
-        if noun_token != chunk.root:
-            continue
-
-        for word in chunk:
-
-            if word.is_stop:
-                continue
-
-            if word.is_upper:  # acronym
-                tokens.append(word.text)
-            else:
-                tokens.append(word.lemma_)
-
-    if len(tokens) == 0:
+    if class_name == "":
         if noun_token.is_upper:
             return noun_token.text
         else:
             return noun
 
-    for i, token in enumerate(tokens):
-        if i == 0:
-            class_name += token
-            continue
-        class_name += token.capitalize()
-
     return class_name
 
 
 # class named
-class_named = [
-    # Pattern: A class named (object of a participle)
-    # Extracted info: Empty class object as the name
-    {
-        "RIGHT_ID": "class",
-        "RIGHT_ATTRS": {"LEMMA": {"IN": ["class", "Class"]}, "DEP": "ROOT"},
-    },
-    {
-        "LEFT_ID": "class",
-        "REL_OP": ">",
-        "RIGHT_ID": "named",
-        "RIGHT_ATTRS": {"POS": "VERB", "LEMMA": "name"},
-    },
-    {
-        "LEFT_ID": "named",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "oprd"},
-    },
-]
 
 
 def process_class_named(semantics: dict, build: BuiltUML):
@@ -466,29 +855,6 @@ def process_class_named(semantics: dict, build: BuiltUML):
 
 
 # component of a package
-component_package = [
-    # Pattern: (subject) is a component/part of the package ...
-    # Extracted: Empty class of that name
-    {"RIGHT_ID": "copula", "RIGHT_ATTRS": {"LEMMA": "be", "DEP": "ROOT"}},
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "component",
-        "RIGHT_ATTRS": {"DEP": "attr", "LEMMA": {"IN": ["component", "part"]}},
-    },
-    {
-        "LEFT_ID": "component",
-        "REL_OP": ">>",
-        "RIGHT_ID": "package",
-        "RIGHT_ATTRS": {"LEMMA": "package"},
-    },
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-]
 
 
 def process_component_package(semantics: dict, build: BuiltUML):
@@ -501,47 +867,6 @@ def process_component_package(semantics: dict, build: BuiltUML):
 
 
 # to have X, Y, ... and Z
-class_to_have_and_many_clauses = [
-    # Pattern: (subject) has/includes/... (object 1), (object 2) ... and (object n)
-    # Extraction: class with name that has many attributes
-    {
-        "RIGHT_ID": "have",
-        "RIGHT_ATTRS": {
-            "DEP": "ROOT",
-            "LEMMA": {"IN": ["have", "contain", "include", "comprise"]},
-        },
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "first object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-    {
-        "LEFT_ID": "first object",
-        "REL_OP": ">",
-        "RIGHT_ID": "second object",
-        "RIGHT_ATTRS": {"DEP": "appos"},
-    },
-    {
-        "LEFT_ID": "second object",
-        "REL_OP": ">",
-        "RIGHT_ID": "and",
-        "RIGHT_ATTRS": {"DEP": "cc", "LEMMA": "and"},
-    },
-    {
-        "LEFT_ID": "second object",
-        "REL_OP": ">",
-        "RIGHT_ID": "last object",
-        "RIGHT_ATTRS": {"DEP": "conj"},
-    },
-]
 
 
 def process_class_to_have_and_many_clauses(semantics: dict, build: BuiltUML):
@@ -562,43 +887,6 @@ def process_class_to_have_and_many_clauses(semantics: dict, build: BuiltUML):
     return package
 
 
-class_to_have_and_clause = [
-    # Pattern: (subject) has/includes/... (object 1) and (object 2)
-    # Extraction: class with name that has many attributes
-    {
-        "RIGHT_ID": "have",
-        "RIGHT_ATTRS": {
-            "DEP": "ROOT",
-            "LEMMA": {"IN": ["have", "contain", "include", "comprise"]},
-        },
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "first object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-    {
-        "LEFT_ID": "first object",
-        "REL_OP": ">",
-        "RIGHT_ID": "and",
-        "RIGHT_ATTRS": {"DEP": "cc", "LEMMA": "and"},
-    },
-    {
-        "LEFT_ID": "first object",
-        "REL_OP": ">",
-        "RIGHT_ID": "last object",
-        "RIGHT_ATTRS": {"DEP": "conj"},
-    },
-]
-
-
 def process_class_to_have_and_clause(semantics: dict, build: BuiltUML):
     class_name = make_noun_pascal_case(semantics, build, semantics["subject"])
 
@@ -620,30 +908,6 @@ def process_class_to_have_and_clause(semantics: dict, build: BuiltUML):
 # Relationship pattern
 
 # simple to have
-rel_to_have = [
-    # Pattern: (subject) has (object)
-    # Extracted: Two classes with an unnamed association from subject to object
-    {
-        "RIGHT_ID": "have",
-        "RIGHT_ATTRS": {
-            "DEP": "ROOT",
-            "POS": "VERB",
-            "LEMMA": {"IN": ["have", "contain"]},
-        },
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "have",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-]
 
 
 def process_rel_to_have(semantics: dict, build: BuiltUML):
@@ -660,58 +924,66 @@ def process_rel_to_have(semantics: dict, build: BuiltUML):
     return package
 
 
-# to have with multiplicity check
-rel_to_have_multiplicity = [
-    # Pattern is: A (noun for class A) has (numerical multiplicity) (noun for class B)
-    # Extracted info: Class A has a relationship of a certain multiplicity with Class B
-    # Procedure:
-    # 1. use the dependency matcher for general syntax
-    # 2. use the phrase matcher for multiplicities
-    {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"LEMMA": "have"}},
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-    {
-        "LEFT_ID": "object",
-        "REL_OP": ">",
-        "RIGHT_ID": "number",
-        "RIGHT_ATTRS": {"POS": "NUM", "DEP": "nummod"},
-    },
-    {
-        "LEFT_ID": "number",
-        "REL_OP": ">",
-        "RIGHT_ID": "adverb",
-        "RIGHT_ATTRS": {"DEP": "advmod"},
-    },
-]
-
 # Multiplicity pattern
-multiplicity_conversion = {
-    "0 or several": "0..*",
-    "one and only one": "1..1",
-    "one or more": "1..*",
-    "zero or more": "0..*",
-    "zero or one": "0..1",
-    "at least one": "1..*",
-    "exactly one": "1..1",
-    "0 or more": "0..*",
-    "0 or many": "0..*",
-    "0 more": "0..*",
-    "one or several": "1..*",
-    "0 or 1": "0..1",
-    "one and only": "1..1",
-}
+# English phrase, UML multiplicity
+MULTIPLICITIES_PATH = os.path.join(os.path.dirname(__file__), "multiplicities.json")
+
+
+def load_multiplicities(path: str = MULTIPLICITIES_PATH) -> dict[str, str]:
+    with open(path) as multiplicities_file:
+        conversion = json.load(multiplicities_file)
+
+    if not isinstance(conversion, dict):
+        raise Exception("Multiplicities are not an object: {}".format(path))
+    for phrase, multiplicity in conversion.items():
+        if not isinstance(multiplicity, str) or len(phrase.strip()) == 0:
+            raise Exception(
+                "Bad multiplicity in {}: {} {}".format(path, phrase, multiplicity)
+            )
+    return conversion
+
+
+multiplicity_conversion = load_multiplicities()
+
+
+class MultiplicityLexicon:
+    """
+    The multiplicity phrases compiled once into a PhraseMatcher, shared by every
+    sentence of a rule set
+    """
+
+    def __init__(self, nlp_model, conversion: dict[str, str] = None) -> None:
+        self.nlp_model = nlp_model
+        self.matcher = PhraseMatcher(nlp_model.vocab)
+        self.conversion: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.update(multiplicity_conversion if conversion is None else conversion)
+
+    def update(self, conversion: dict[str, str]):
+        """
+        Add phrases, e.g. from load_multiplicities of another file
+        """
+        with self._lock:
+            new_phrases = [
+                phrase for phrase in conversion if phrase not in self.conversion
+            ]
+            self.conversion.update(conversion)
+            if len(new_phrases) > 0:
+                # Only run nlp.make_doc to speed things up
+                self.matcher.add(
+                    "Multiplicities",
+                    [self.nlp_model.make_doc(phrase) for phrase in new_phrases],
+                )
+
+    def __call__(self, doc):
+        return self.matcher(doc)
 
+    def __getitem__(self, phrase: str) -> str:
+        return self.conversion[phrase]
 
+
+# to have with multiplicity check
 def process_rel_to_have_multiplicity(
     current_semantics: dict, build_in_progress: BuiltUML
 ):
@@ -730,7 +1002,9 @@ def process_rel_to_have_multiplicity(
 
     # Build UML
 
-    source.association(destination, multiplicity_conversion[found_multiplicity])
+    source.association(
+        destination, build_in_progress.rule_set.multiplicities[found_multiplicity]
+    )
 
     package = uml.UML(source.name)
     package.classes.extend([source, destination])
@@ -738,19 +1012,10 @@ def process_rel_to_have_multiplicity(
 
 
 def extract_multiplicity(current_semantics, build_in_progress):
-    # Get multiplicity
-    matcher = PhraseMatcher(build_in_progress.nlp_model.vocab)
-    # Only run nlp.make_doc to speed things up
-    patterns = [
-        build_in_progress.nlp_model.make_doc(text)
-        for text in multiplicity_conversion.keys()
-    ]
-    matcher.add("Multiplicities", patterns)
-
     # found multiplicity
     found_multiplicity = ""
 
-    matches = matcher(build_in_progress.spacy_doc)
+    matches = build_in_progress.rule_set.multiplicities(build_in_progress.spacy_doc)
     for match_id, start, end in matches:
         span = build_in_progress.spacy_doc[start:end]
 
@@ -771,34 +1036,6 @@ def extract_multiplicity(current_semantics, build_in_progress):
 
 
 # Passive voice
-passive_voice = [
-    # Pattern: (subject) is (verb in passive voice) by (object)
-    # Extracted: Two classes with a relationship of the verb between them.
-    # The relationship is the indicative of the verb.
-    # object -> (verb in active form) -> subject
-    {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"DEP": "ROOT", "POS": "VERB"}},
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {
-            "DEP": "nsubjpass",
-            "POS": {"IN": ["NOUN", "PROPN"]},
-        },  # simple passive voice
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "by",
-        "RIGHT_ATTRS": {"POS": "ADP"},
-    },
-    {
-        "LEFT_ID": "by",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "pobj", "POS": {"IN": ["NOUN", "PROPN"]}},
-    },
-]
 
 
 def process_passive_voice(semantics: dict, build: BuiltUML):
@@ -818,26 +1055,6 @@ def process_passive_voice(semantics: dict, build: BuiltUML):
 
 
 # Composition
-composed = [
-    # Pattern: (subject) is composed/associated ... (object)
-    # Extracted: Two classes with a relation from subject to object
-    {
-        "RIGHT_ID": "composed",
-        "RIGHT_ATTRS": {"LEMMA": {"IN": ["compose", "associate"]}, "DEP": "ROOT"},
-    },
-    {
-        "LEFT_ID": "composed",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubjpass"},
-    },
-    {
-        "LEFT_ID": "composed",
-        "REL_OP": ">>",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"POS": {"IN": ["PROPN", "NOUN"]}},
-    },
-]
 
 
 def process_composed(semantics: dict, build: BuiltUML):
@@ -855,26 +1072,6 @@ def process_composed(semantics: dict, build: BuiltUML):
 
 
 # Active voice
-active_voice = [
-    # Pattern: (subject) (verb in active voice, except some) (object)
-    # Extracted: Two classes with a named relation
-    {
-        "RIGHT_ID": "verb",
-        "RIGHT_ATTRS": {"LEMMA": {"NOT_IN": ["be", "exist"]}, "DEP": "ROOT"},
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "dobj"},
-    },
-]
 
 
 def process_active_voice(semantics: dict, build: BuiltUML):
@@ -894,26 +1091,6 @@ def process_active_voice(semantics: dict, build: BuiltUML):
 
 
 # Active voice with prepositional verbs
-active_voice_preposition = [
-    # Pattern: (subject) (prepositional verb in active voice, except some) (object)
-    # Extracted: Two classes with a named relation
-    {
-        "RIGHT_ID": "verb",
-        "RIGHT_ATTRS": {"DEP": "ROOT", "LEMMA": {"NOT_IN": ["be", "exist"]}},
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "verb",
-        "REL_OP": ">>",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"DEP": "pobj"},
-    },
-]
 
 
 def process_active_voice_preposition(semantics: dict, build: BuiltUML):
@@ -921,26 +1098,6 @@ def process_active_voice_preposition(semantics: dict, build: BuiltUML):
 
 
 # Simple with
-noun_with = [
-    # Pattern: (noun) with (noun)
-    # Extracted: Two classes with a relation
-    {
-        "RIGHT_ID": "noun",
-        "RIGHT_ATTRS": {"POS": {"IN": ["PROPN", "NOUN"]}, "DEP": "ROOT"},
-    },
-    {
-        "LEFT_ID": "noun",
-        "REL_OP": ">",
-        "RIGHT_ID": "with",
-        "RIGHT_ATTRS": {"POS": "ADP", "DEP": "prep", "LEMMA": "with"},
-    },
-    {
-        "LEFT_ID": "with",
-        "REL_OP": ">",
-        "RIGHT_ID": "object",
-        "RIGHT_ATTRS": {"POS": {"IN": ["PROPN", "NOUN"]}, "DEP": "pobj"},
-    },
-]
 
 
 def process_noun_with(semantics: dict, build: BuiltUML):
@@ -958,36 +1115,6 @@ def process_noun_with(semantics: dict, build: BuiltUML):
 
 
 # copula + prep
-copula_rel = [
-    # Pattern: (subject) is (complement) of/in (noun)
-    # Extracted: Subject class is pointed to by a noun class with a complement
-    # name for the relation.
-    {"RIGHT_ID": "copula", "RIGHT_ATTRS": {"LEMMA": "be", "DEP": "ROOT"}},
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "subject",
-        "RIGHT_ATTRS": {"DEP": "nsubj"},
-    },
-    {
-        "LEFT_ID": "copula",
-        "REL_OP": ">",
-        "RIGHT_ID": "complement",
-        "RIGHT_ATTRS": {"DEP": "attr"},
-    },
-    {
-        "LEFT_ID": "complement",
-        "REL_OP": ">",
-        "RIGHT_ID": "prep",
-        "RIGHT_ATTRS": {"POS": "ADP"},
-    },
-    {
-        "LEFT_ID": "prep",
-        "REL_OP": ">",
-        "RIGHT_ID": "noun",
-        "RIGHT_ATTRS": {"DEP": "pobj"},
-    },
-]
 
 
 def process_copula_rel(semantics: dict, build: BuiltUML):
@@ -1004,4 +1131,3 @@ def process_copula_rel(semantics: dict, build: BuiltUML):
     package = uml.UML(source_eclass.name)
     package.classes.extend([source_eclass, dest_eclass])
     return package
-
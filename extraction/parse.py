@@ -1,12 +1,17 @@
 """
 Parse the English text using rules
 """
-from . import nlp_patterns
+import hashlib
+import itertools
+import os
+import sys
+import threading
+from typing import Callable, Iterable, Union
+from spacy.tokens import Doc
+from . import nlp_patterns, pipelines, trace
+from .utils import uml
 
 if __name__ == "__main__":
-    import os
-    import sys
-
     if len(sys.argv) != 3:
         print(
             "Usage: py parse.py kind out_file [ < pipe text through stdin ]",
@@ -30,116 +35,261 @@ if __name__ == "__main__":
 
 class LazyLoadedExtractor:
     """
-    See ../translate.py for example usage
+    Extractor keeping the last sentence, see extract for the stateless version
     """
 
     def __init__(self, text: str, kind: str) -> None:
-        self.extractor = nlp_patterns.BuiltUML(sentence=text, kind=kind)
+        self.extractor = nlp_patterns.BuiltUML(
+            sentence=text, kind=kind, rule_set=compiled_rule_set(kind)
+        )
 
     def handle_class(self, verbose=False):
-        extractor = self.extractor
+        PACKAGE = self.extractor.parse(verbose=verbose)
+        check_fragment("class", PACKAGE)
+        return PACKAGE
 
-        add_class_rules(extractor)
+    def handle_rel(self, verbose=False):
+        PACKAGE = self.extractor.parse(verbose=verbose)
+        check_fragment("rel", PACKAGE)
+        return PACKAGE
 
-        PACKAGE = extractor.parse(verbose=verbose)
 
-        # integrity check
-        if PACKAGE is not None and len(PACKAGE.classes) != 1:
-            raise Exception(
-                "Class fragment has more than one class: {}".format(
-                    PACKAGE.package_name
-                )
-            )
+def extract(doc, kind: str, verbose=False) -> Union[uml.UML, None]:
+    """
+    Fragment of a sentence parsed by the extraction pipeline, None if no rule matched.
 
-        return PACKAGE
+    Nothing is shared between calls but the compiled rule sets, so many threads can
+    extract at the same time.
+    """
+    context = nlp_patterns.MatchContext(doc, kind)
+    PACKAGE = compiled_rule_set(kind).apply(context, verbose=verbose)
+    check_fragment(kind, PACKAGE)
+    return PACKAGE
 
-    def handle_rel(self, verbose=False):
-        extractor = self.extractor
 
-        add_rel_rules(extractor)
+def extract_many(
+    sentences: Iterable[Union[str, Doc]],
+    kinds: Union[str, Iterable[str]],
+    batch_size: int = 64,
+    n_process: int = 1,
+    verbose=False,
+):
+    """
+    Fragments of many sentences of the given kinds, or of one kind for all, in order.
+
+    The sentences given as text go through nlp.pipe of the extraction pipeline,
+    batch_size at a time in n_process processes. Docs that were already parsed, e.g.
+    by preprocess.parse_sentences, are used as they are. The compiled rule set is then
+    applied to each doc, a dependency matcher has no pipe of its own.
+    """
+    if isinstance(kinds, str):
+        kinds = itertools.repeat(kinds)
+    sentences = list(sentences)
+
+    parsed = pipelines.get("extraction").pipe(
+        [sentence for sentence in sentences if not isinstance(sentence, Doc)],
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+
+    for sentence, kind in zip(sentences, kinds):
+        doc = sentence if isinstance(sentence, Doc) else next(parsed)
+        with trace.span("extract", kind=kind):
+            yield extract(doc, kind, verbose=verbose)
+
+
+def extract_combined(
+    doc, classify: Callable[[str], str], verbose=False
+) -> tuple[Union[str, None], Union[uml.UML, None]]:
+    """
+    Kind and fragment of a sentence, without classifying it first. The rules of both
+    kinds are matched, and the classifier only picks the kind when both build a
+    fragment. Kind and fragment are None if no rule matched.
+    """
+    fragments = {}
+    for kind in nlp_patterns.KINDS:
+        PACKAGE = extract(doc, kind, verbose=verbose)
+        if PACKAGE is not None:
+            fragments[kind] = PACKAGE
+
+    if len(fragments) == 0:
+        return None, None
+    if len(fragments) == 1:
+        return next(iter(fragments.items()))
+
+    kind = classify(doc.text)
+    return kind, fragments[kind]
 
-        PACKAGE = extractor.parse(verbose=verbose)
 
-        # integrity check
-        if PACKAGE is not None and len(PACKAGE.classes) != 2:
-            raise Exception(
-                "Rel fragment does not have exactly two classes: {}".format(
-                    PACKAGE.package_name
-                )
+def check_fragment(kind: str, PACKAGE: Union[uml.UML, None]):
+    """
+    Integrity check of an extracted fragment
+    """
+    if PACKAGE is None:
+        return
+
+    if kind == "class" and len(PACKAGE.classes) != 1:
+        raise Exception(
+            "Class fragment has more than one class: {}".format(PACKAGE.package_name)
+        )
+
+    if kind == "rel" and len(PACKAGE.classes) != 2:
+        raise Exception(
+            "Rel fragment does not have exactly two classes: {}".format(
+                PACKAGE.package_name
             )
+        )
 
-        return PACKAGE
 
+# Every rule of the extraction, see nlp_patterns.load_rule_definitions. When several rules
+# match a sentence, the fragment comes from the matched rule with the lowest priority
+# number that builds one.
+RULES_PATH = os.path.join(os.path.dirname(__file__), "rules.json")
 
-def add_class_rules(extractor: nlp_patterns.BuiltUML):
-    extractor.add_rule(
-        "simple copula", [nlp_patterns.copula_class], nlp_patterns.process_copula_class
-    )
-    extractor.add_rule(
-        "there is or exists", [nlp_patterns.expletive], nlp_patterns.process_expletive
-    )
-    extractor.add_rule(
-        "compound", [nlp_patterns.compound], nlp_patterns.process_compound
-    )
-    extractor.add_rule(
-        "compound class explicit",
-        [nlp_patterns.compound_class_explicit],
-        nlp_patterns.process_compound_class_explicit,
-    )
-    extractor.add_rule(
-        "to have", [nlp_patterns.class_to_have], nlp_patterns.process_class_to_have
-    )
-    extractor.add_rule(
-        "class named", [nlp_patterns.class_named], nlp_patterns.process_class_named
-    )
-    extractor.add_rule(
-        "component of package",
-        [nlp_patterns.component_package],
-        nlp_patterns.process_component_package,
-    )
-    extractor.add_rule(
-        "3 component and clause",
-        [nlp_patterns.class_to_have_and_many_clauses],
-        nlp_patterns.process_class_to_have_and_many_clauses,
-    )
-    extractor.add_rule(
-        "2 component and clause",
-        [nlp_patterns.class_to_have_and_clause],
-        nlp_patterns.process_class_to_have_and_clause,
-    )
 
+class LoadedRules:
+    """
+    The rules of a rule file and the multiplicities, with the hash of both files
+    """
 
-def add_rel_rules(extractor: nlp_patterns.BuiltUML):
-    extractor.add_rule(
-        "to have multiplicity",
-        [nlp_patterns.rel_to_have_multiplicity],
-        nlp_patterns.process_rel_to_have_multiplicity,
-    )
-    extractor.add_rule(
-        "passive voice",
-        [nlp_patterns.passive_voice],
-        nlp_patterns.process_passive_voice,
-    )
-    extractor.add_rule(
-        "to have", [nlp_patterns.rel_to_have], nlp_patterns.process_rel_to_have
-    )
-    extractor.add_rule(
-        "composed", [nlp_patterns.composed], nlp_patterns.process_composed
-    )
-    extractor.add_rule(
-        "active voice", [nlp_patterns.active_voice], nlp_patterns.process_active_voice
-    )
-    extractor.add_rule(
-        "active voice preposition",
-        [nlp_patterns.active_voice_preposition],
-        nlp_patterns.process_active_voice_preposition,
-    )
-    extractor.add_rule(
-        "noun with", [nlp_patterns.noun_with], nlp_patterns.process_noun_with
-    )
-    extractor.add_rule(
-        "copula rel", [nlp_patterns.copula_rel], nlp_patterns.process_copula_rel
+    def __init__(self, path: str = RULES_PATH) -> None:
+        self.path = path
+        self.digest = files_digest([path, nlp_patterns.MULTIPLICITIES_PATH])
+        self.registry = nlp_patterns.RuleRegistry.from_definitions(
+            nlp_patterns.load_rule_definitions(path)
+        )
+        self.multiplicity_conversion = nlp_patterns.load_multiplicities()
+
+
+def files_digest(paths: list[str]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as hashed:
+            digest.update(hashed.read())
+    return digest.hexdigest()
+
+
+_loaded_rules = LoadedRules()
+RULES = _loaded_rules.registry
+
+# (kind, digest of the rule files), frozen rule set
+_compiled_rule_sets: dict[tuple[str, str], nlp_patterns.RuleSet] = {}
+_compile_lock = threading.Lock()
+
+
+def compiled_rule_set(kind: str) -> nlp_patterns.RuleSet:
+    """
+    The rules of a kind, compiled on first use and shared until the rules are reloaded
+    """
+    loaded = _loaded_rules
+    rule_set = _compiled_rule_sets.get((kind, loaded.digest))
+    if rule_set is not None:
+        return rule_set
+
+    with _compile_lock:
+        return compile_rule_set(kind, loaded)
+
+
+def compile_rule_set(kind: str, loaded: LoadedRules) -> nlp_patterns.RuleSet:
+    # with _compile_lock held
+    if (kind, loaded.digest) in _compiled_rule_sets:
+        return _compiled_rule_sets[(kind, loaded.digest)]
+
+    rule_set = loaded.registry.rule_set(
+        kind, pipelines.get("extraction").vocab, loaded.multiplicity_conversion
     )
+    # compiled now rather than by the first sentence with a multiplicity, so forked
+    # workers get it too
+    rule_set.multiplicities
+    _compiled_rule_sets[(kind, loaded.digest)] = rule_set
+    return rule_set
+
+
+def reload_rules(path: str = None) -> dict:
+    """
+    Load the rule files again, e.g. in a running server. The new rules are validated and
+    compiled before they replace the old ones, which stay in use if anything fails.
+    Nothing is compiled again if the files did not change.
+    """
+    global _loaded_rules, RULES
+
+    loaded = LoadedRules(path or _loaded_rules.path)
+    changed = loaded.digest != _loaded_rules.digest
+
+    with _compile_lock:
+        for kind in nlp_patterns.KINDS:
+            compile_rule_set(kind, loaded)
+
+        _loaded_rules = loaded
+        RULES = loaded.registry
+        for key in list(_compiled_rule_sets):
+            if key[1] != loaded.digest:
+                del _compiled_rule_sets[key]
+
+    return {
+        "digest": loaded.digest,
+        "changed": changed,
+        "rules": {
+            kind: len(loaded.registry.rules_of(kind)) for kind in nlp_patterns.KINDS
+        },
+    }
+
+
+def rule_report() -> list[dict]:
+    """
+    Stats of every rule of the compiled rule sets, see RuleSet.report
+    """
+    rows = []
+    for kind in nlp_patterns.KINDS:
+        rule_set = _compiled_rule_sets.get((kind, _loaded_rules.digest))
+        if rule_set is not None:
+            rows.extend(rule_set.report())
+    return rows
+
+
+def print_rule_report(file=sys.stderr):
+    rows = rule_report()
+    for row in rows:
+        print(
+            "Rule {} {}: {} evaluated, {} skipped, {} not reached, {} matches, {} wins, {} exceptions, {:.1f} ms matching, {:.1f} ms building".format(
+                row["kind"],
+                row["rule"],
+                row["evaluated"],
+                row["skipped"],
+                row["not reached"],
+                row["matches"],
+                row["wins"],
+                row["exceptions"],
+                row["match ms"],
+                row["build ms"],
+            ),
+            file=file,
+        )
+    skipped = sum(row["skipped"] for row in rows)
+    total = skipped + sum(row["evaluated"] for row in rows)
+    if total > 0:
+        print(
+            "Pattern evaluations skipped by the anchor index: {} of {} ({:.1%})".format(
+                skipped, total, skipped / total
+            ),
+            file=file,
+        )
+
+
+def add_rules(extractor: Union[nlp_patterns.BuiltUML, nlp_patterns.RuleSet], kind: str):
+    """
+    Add the registered rules of a kind to an extractor that was built without them
+    """
+    for rule in RULES.rules_of(kind):
+        extractor.add_rule(rule.name, rule.pattern, rule.action, rule.priority)
+
+
+def add_class_rules(extractor: Union[nlp_patterns.BuiltUML, nlp_patterns.RuleSet]):
+    add_rules(extractor, "class")
+
+
+def add_rel_rules(extractor: Union[nlp_patterns.BuiltUML, nlp_patterns.RuleSet]):
+    add_rules(extractor, "rel")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+"""
+Process-wide registry of spaCy pipelines
+
+Every stage of the translation asks this module for its pipeline instead of calling
+spacy.load itself. Each configuration is loaded once per process and the same Language
+object is handed to every caller.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+import spacy
+from spacy.language import Language
+
+# name: how to build the pipeline
+PIPELINES = {
+    # dependency rules only need the tagger, parser, lemmatizer and noun chunks
+    "extraction": {"model": "en_core_web_sm", "exclude": ["ner"], "add": []},
+    # coreferee reads the entity labels, so keep the full pipeline
+    "coref": {"model": "en_core_web_sm", "exclude": [], "add": ["coreferee"]},
+}
+
+_loaded: dict[str, Language] = {}
+_stats: dict[str, dict] = {}  # name, load statistics
+_lock = threading.Lock()
+
+
+def get(name: str = "extraction") -> Language:
+    """
+    Returns the shared pipeline of the given configuration, loading it on first use
+    """
+    nlp = _loaded.get(name)
+    if nlp is not None:
+        return nlp
+
+    with _lock:
+        # another thread may have loaded it while we waited
+        if name in _loaded:
+            return _loaded[name]
+
+        if name not in PIPELINES:
+            raise Exception("Unknown pipeline configuration: {}".format(name))
+        config = PIPELINES[name]
+
+        rss_before = resident_memory()
+        start = time.perf_counter()
+
+        if "coreferee" in config["add"]:
+            # registers the factory, pulls in tensorflow
+            importlib.import_module("coreferee")
+
+        nlp = spacy.load(config["model"], exclude=config["exclude"])
+        for component in config["add"]:
+            nlp.add_pipe(component)
+
+        _stats[name] = {
+            "pipeline": name,
+            "model": config["model"],
+            "components": list(nlp.pipe_names),
+            "load seconds": time.perf_counter() - start,
+            "rss delta MB": (resident_memory() - rss_before) / 2**20,
+        }
+        _loaded[name] = nlp
+
+    return nlp
+
+
+def is_loaded(name: str) -> bool:
+    return name in _loaded
+
+
+def report() -> list[dict]:
+    """
+    Load time and resident memory added by each pipeline loaded so far
+    """
+    return [dict(stats) for stats in _stats.values()]
+
+
+def print_report(file=sys.stderr):
+    for stats in report():
+        print(
+            "Pipeline {}: {:.2f} s, {:+.1f} MB resident ({})".format(
+                stats["pipeline"],
+                stats["load seconds"],
+                stats["rss delta MB"],
+                ", ".join(stats["components"]),
+            ),
+            file=file,
+        )
+    print(
+        "Total resident memory: {:.1f} MB".format(resident_memory() / 2**20),
+        file=file,
+    )
+
+
+def resident_memory() -> int:
+    """
+    Current resident set size of this process, in bytes
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # not linux, fall back to the peak which is the best we have
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+if __name__ == "__main__":
+    # Usage: python -m extraction.pipelines [configuration ...]
+    for pipeline_name in sys.argv[1:] or list(PIPELINES.keys()):
+        get(pipeline_name)
+    print_report(file=sys.stdout)
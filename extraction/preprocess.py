@@ -15,21 +15,49 @@ if __name__ == "__main__":
     CLASSIFIED = os.path.join(os.getcwd(), sys.argv[1])
     OUTPUT = os.path.join(os.getcwd(), sys.argv[2])
 
-import pickle
 from numpy import nan
-import spacy, coreferee.data_model
-
-
-nlp = spacy.load("en_core_web_sm")
-nlp.add_pipe("coreferee")
+import coreferee.data_model
+from . import pipelines
+from classification.predict_kind import LazyLoadedClassifier
 
 
 def resolve_coref(text: str):
     """
     Substitute all the coreferences. Then split the sentences.
     """
-    doc = nlp(text)
+    return resolve_coref_doc(pipelines.get("coref")(text))
+
+
+def resolve_coref_many(texts, batch_size: int = 64, keep_spans: bool = False):
+    """
+    Same as resolve_coref, but the texts go through the pipeline in batches.
+
+    Yields the sentences of each text in the same order as the texts. With keep_spans,
+    the sentences are given like resolve_coref_sentences does.
+    """
+    for doc in pipelines.get("coref").pipe(texts, batch_size=batch_size):
+        if keep_spans:
+            yield resolve_coref_sentences(doc)
+        else:
+            yield resolve_coref_doc(doc)
+
 
+def resolve_coref_doc(doc):
+    """
+    Substitutions and sentence splitting of an already parsed text
+    """
+    return {
+        sent_id: text for sent_id, (text, _) in resolve_coref_sentences(doc).items()
+    }
+
+
+def resolve_coref_sentences(doc):
+    """
+    Same as resolve_coref_doc, but each sentence comes with its span in the parsed text.
+
+    The span is None when a pronoun of the sentence was substituted: only those
+    sentences need to be parsed again. Returns sentence id, (sentence str, span).
+    """
     chains: coreferee.data_model.ChainHolder = doc._.coref_chains
 
     substitutions = {}
@@ -63,6 +91,7 @@ def resolve_coref(text: str):
     result = {0: ""}  # sentence id, sentence str
     carry_over = {}  # token id, replacement str
     sent_id = 0  # current sentence
+    changed = set()  # sentence ids with a substitution
 
     # cycle through the original text
     for token in doc:
@@ -82,10 +111,12 @@ def resolve_coref(text: str):
 
             result[sent_id] += conjunctive_addition([doc[w].text for w in replacement])
             result[sent_id] += " "
+            changed.add(sent_id)
 
         # carry over substitution
         elif token.i in carry_over:
             result[sent_id] += carry_over[token.i]
+            changed.add(sent_id)
 
         # no substitution
         else:
@@ -101,7 +132,29 @@ def resolve_coref(text: str):
         result[key] = result[key].strip()
     del result[sent_id]
 
-    return result
+    return {
+        key: (result[key], None if key in changed else span)
+        for key, span in zip(result.keys(), doc.sents)
+    }
+
+
+def parse_sentences(sentences, batch_size: int = 64):
+    """
+    Docs ready for extraction of the (sentence str, span) pairs of resolve_coref_sentences.
+
+    The spans already parsed by the coref pipeline are reused. Only the sentences with
+    a substitution go through the extraction pipeline again. Yields in the same order.
+    """
+    sentences = list(sentences)
+    reparsed = pipelines.get("extraction").pipe(
+        [text for text, span in sentences if span is None], batch_size=batch_size
+    )
+
+    for text, span in sentences:
+        if span is None:
+            yield next(reparsed)
+        else:
+            yield span.as_doc()
 
 
 def conjunctive_addition(words: list[str]):
@@ -114,30 +167,6 @@ def conjunctive_addition(words: list[str]):
         return ",".join(words[:-1]) + " and " + words[-1]
 
 
-class LazyLoadedClassifier:
-    def __init__(self) -> None:
-        self.is_loaded = False
-        self.model = None
-        self.vec = None
-
-    def predict(self, text: str):
-
-        path = os.path.abspath(os.path.dirname(__file__))
-
-        if self.is_loaded:
-            model = self.model
-            vec = self.vec
-        else:
-            model = pickle.load(
-                open(os.path.join(path, "../classification/bernoulliNB.pickle"), "rb")
-            )
-            vec = pickle.load(
-                open(os.path.join(path, "../classification/tfidf.vec"), "rb")
-            )
-
-        return model.predict(vec.transform([text]))[0]
-
-
 if __name__ == "__main__":
 
     import pandas
@@ -176,10 +205,13 @@ if __name__ == "__main__":
 
         else:
             # perform predictions
-            for sentence_id, sentence_text in resolution.items():
+            predicted_kinds = kind_predictor.predict_many(resolution.values())
+            for (sentence_id, sentence_text), predicted_kind in zip(
+                resolution.items(), predicted_kinds
+            ):
                 processed_index.append(index)
                 processed_text.append(sentence_text)
-                processed_kind.append(kind_predictor.predict(sentence_text))
+                processed_kind.append(predicted_kind)
                 processed_offset.append(sentence_id)
 
     new_data = pandas.DataFrame(
@@ -191,4 +223,3 @@ if __name__ == "__main__":
         }
     )
     new_data.to_csv(OUTPUT)
-
@@ -0,0 +1,115 @@
+"""
+Profile of every extraction rule over a corpus
+
+Each sentence of a CSV goes through the compiled rule sets. For every rule, the report
+counts the sentences it was evaluated on, skipped by the anchor index or not reached,
+the matches found, the calls of its builder, the fragments it won with and the
+exceptions raised, with the time spent matching and building. Rules that are slow or
+never win are the ones to reorder or retire.
+"""
+import sys
+
+USAGE = "Usage: python -m extraction.rule_report corpus.csv report.csv [--text-column english] [--kind-column kind] [--sort match ms] [--batch-size 64]"
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+
+    def pop_option(flag: str, default):
+        if flag not in ARGS:
+            return default
+        position = ARGS.index(flag)
+        value = ARGS[position + 1]
+        del ARGS[position : position + 2]
+        return value
+
+    TEXT_COLUMN = pop_option("--text-column", "english")
+    KIND_COLUMN = pop_option("--kind-column", "kind")
+    SORT = pop_option("--sort", "match ms")
+    BATCH_SIZE = int(pop_option("--batch-size", 64))
+
+    if len(ARGS) != 2:
+        print(USAGE, file=sys.stderr)
+        print(
+            "Without the kind column, every sentence is matched against the rules of both kinds.",
+            file=sys.stderr,
+        )
+        exit(1)
+
+import traceback
+
+import pandas
+
+from . import nlp_patterns, parse, pipelines
+
+
+def profile_corpus(
+    sentences: list[str], kinds: list[str] = None, batch_size: int = 64
+) -> dict:
+    """
+    Extract every sentence, with its kind or with both. Returns the number of
+    extractions and of those that raised, the rules keep the rest.
+    """
+    if kinds is None:
+        kinds = [None] * len(sentences)
+
+    extractions = 0
+    failures = 0
+    docs = pipelines.get("extraction").pipe(sentences, batch_size=batch_size)
+    for doc, kind in zip(docs, kinds):
+        for sentence_kind in nlp_patterns.KINDS if kind is None else [kind]:
+            extractions += 1
+            try:
+                parse.extract(doc, sentence_kind)
+            except Exception:
+                # counted by the rule that raised, the corpus goes on
+                failures += 1
+                traceback.print_exc()
+
+    return {"extractions": extractions, "failures": failures}
+
+
+def report(sort: str = "match ms") -> pandas.DataFrame:
+    """
+    The stats of the rules since the start of the process, most expensive first
+    """
+    table = pandas.DataFrame(parse.rule_report())
+    if len(table) == 0:
+        return table
+
+    evaluated = table["evaluated"].where(table["evaluated"] > 0)
+    table["win rate"] = (table["wins"] / evaluated).fillna(0)
+    table["match us per sentence"] = (table["match ms"] * 1000 / evaluated).fillna(0)
+    table["build us per call"] = (
+        table["build ms"] * 1000 / table["builds"].where(table["builds"] > 0)
+    ).fillna(0)
+
+    if sort not in table.columns:
+        raise Exception(
+            "Unknown column to sort by: {}. Columns are {}".format(
+                sort, ", ".join(table.columns)
+            )
+        )
+    return table.sort_values(sort, ascending=False, kind="stable")
+
+
+if __name__ == "__main__":
+    corpus = pandas.read_csv(ARGS[0])
+    if TEXT_COLUMN not in corpus.columns:
+        raise Exception("No {} column in {}".format(TEXT_COLUMN, ARGS[0]))
+
+    sentences = [str(text) for text in corpus[TEXT_COLUMN]]
+    kinds = None
+    if KIND_COLUMN in corpus.columns:
+        kinds = [str(kind) for kind in corpus[KIND_COLUMN]]
+
+    totals = profile_corpus(sentences, kinds, batch_size=BATCH_SIZE)
+    table = report(SORT)
+    table.to_csv(ARGS[1], index=False)
+
+    with pandas.option_context("display.width", 200, "display.max_columns", None):
+        print(table.to_string(index=False))
+    print(
+        "{} sentences, {} extractions, {} raised. Saved to {}".format(
+            len(sentences), totals["extractions"], totals["failures"], ARGS[1]
+        )
+    )
@@ -5,15 +5,19 @@ import itertools
 from sys import argv, stderr
 from typing import Callable, Tuple
 
+PROFILE = "--profile" in argv
+if PROFILE:
+    argv.remove("--profile")
+
 if len(argv) != 2:
-    print("Usage: py test.py processed-csv", file=stderr)
+    print("Usage: py test.py processed-csv [--profile]", file=stderr)
     exit(1)
 
 import os
 import pandas as pd
 from . import nlp_patterns
 from .utils import uml, inquire
-from . import parse
+from . import parse, trace
 import termcolor
 
 
@@ -101,12 +105,7 @@ def test_rule(
 
 
 def test_all_rules(kind: str):
-    extractor = nlp_patterns.BuiltUML("", kind)
-
-    if kind == "class":
-        parse.add_class_rules(extractor)
-    elif kind == "rel":
-        parse.add_rel_rules(extractor)
+    extractor = nlp_patterns.BuiltUML("", kind, parse.compiled_rule_set(kind))
 
     # stats
     passed = 0
@@ -167,7 +166,10 @@ def test_semantics():
     """
     Tests all the rules at once on the semantics of a fragment
     """
-    extractor = nlp_patterns.BuiltUML("", "class")
+    extractors = {
+        kind: nlp_patterns.BuiltUML("", kind, parse.compiled_rule_set(kind))
+        for kind in ["class", "rel"]
+    }
 
     # stats
     passed = 0
@@ -184,14 +186,9 @@ def test_semantics():
     for index, fragment in PREPROCESSED_CSV_DATAFRAME.iterrows():
         kind = fragment["kind"]
 
-        extractor.clear_rules()
+        extractor = extractors[kind]
         extractor.clear_result()
 
-        if kind == "class":
-            parse.add_class_rules(extractor)
-        elif kind == "rel":
-            parse.add_rel_rules(extractor)
-
         extractor.set_sentence(fragment["english"])
         result = extractor.parse(verbose=False)
 
@@ -253,91 +250,9 @@ def test_semantics():
 def unit_parsing():
     print(termcolor.colored("UNIT PARSING", "yellow"))
     print("OVERVIEW")
-    test_rule(
-        "class",
-        "simple copula",
-        [nlp_patterns.copula_class],
-        nlp_patterns.process_copula_class,
-    )
-    test_rule(
-        "class",
-        "there is or exists",
-        [nlp_patterns.expletive],
-        nlp_patterns.process_expletive,
-    )
-    test_rule(
-        "class", "compound", [nlp_patterns.compound], nlp_patterns.process_compound
-    )
-    test_rule(
-        "class",
-        "compound class explicit",
-        [nlp_patterns.compound_class_explicit],
-        nlp_patterns.process_compound_class_explicit,
-    )
-    test_rule(
-        "class",
-        "to have",
-        [nlp_patterns.class_to_have],
-        nlp_patterns.process_class_to_have,
-    )
-    test_rule(
-        "class",
-        "class named",
-        [nlp_patterns.class_named],
-        nlp_patterns.process_class_named,
-    )
-    test_rule(
-        "class",
-        "component of package",
-        [nlp_patterns.component_package],
-        nlp_patterns.process_component_package,
-    )
-    test_rule(
-        "class",
-        "3 component and clause",
-        [nlp_patterns.class_to_have_and_many_clauses],
-        nlp_patterns.process_class_to_have_and_many_clauses,
-    )
-    test_rule(
-        "class",
-        "2 component and clause",
-        [nlp_patterns.class_to_have_and_clause],
-        nlp_patterns.process_class_to_have_and_clause,
-    )
-    test_rule(
-        "rel",
-        "to have with multiplicity",
-        [nlp_patterns.rel_to_have_multiplicity],
-        nlp_patterns.process_rel_to_have_multiplicity,
-    )
-    test_rule(
-        "rel",
-        "passive voice",
-        [nlp_patterns.passive_voice],
-        nlp_patterns.process_passive_voice,
-    )
-    test_rule(
-        "rel", "to have", [nlp_patterns.rel_to_have], nlp_patterns.process_rel_to_have
-    )
-    test_rule("rel", "composed", [nlp_patterns.composed], nlp_patterns.process_composed)
-    test_rule(
-        "rel",
-        "active voice",
-        [nlp_patterns.active_voice],
-        nlp_patterns.process_active_voice,
-    )
-    test_rule(
-        "rel",
-        "active voice preposition",
-        [nlp_patterns.active_voice_preposition],
-        nlp_patterns.process_active_voice_preposition,
-    )
-    test_rule(
-        "rel", "noun with", [nlp_patterns.noun_with], nlp_patterns.process_noun_with
-    )
-    test_rule(
-        "rel", "copula rel", [nlp_patterns.copula_rel], nlp_patterns.process_copula_rel
-    )
+    for kind in nlp_patterns.KINDS:
+        for rule in parse.RULES.rules_of(kind):
+            test_rule(kind, rule.name, rule.pattern, rule.action)
     print()
     print("DETAILS")
     print("Individual cases are logged at the temp folder next to this script")
@@ -351,6 +266,58 @@ def unit_parsing():
     print()
 
 
+def unit_rule_definitions():
+    """
+    The rule file is valid and broken rules are refused before anything is compiled
+    """
+    print(termcolor.colored("RULE DEFINITIONS", "yellow"))
+    definitions = nlp_patterns.load_rule_definitions(parse.RULES_PATH)
+    print(f"{len(definitions)} rules in {parse.RULES_PATH}")
+
+    valid = definitions[0]
+    broken = {
+        "unknown kind": {**valid, "kind": "package"},
+        "unknown builder": {**valid, "builder": "process_nothing"},
+        "not a builder": {**valid, "builder": "make_noun_camel_case"},
+        "no pattern": {key: value for key, value in valid.items() if key != "pattern"},
+        "unknown key": {**valid, "weight": 1},
+        "unknown token id": {
+            **valid,
+            "pattern": [
+                [
+                    valid["pattern"][0][0],
+                    {**valid["pattern"][0][1], "LEFT_ID": "nowhere"},
+                ]
+            ],
+        },
+        "unknown operator": {
+            **valid,
+            "pattern": [
+                [valid["pattern"][0][0], {**valid["pattern"][0][1], "REL_OP": "=>"}]
+            ],
+        },
+        "unknown attribute": {
+            **valid,
+            "pattern": [[{"RIGHT_ID": "word", "RIGHT_ATTRS": {"COLOUR": "red"}}]],
+        },
+    }
+    for case, definition in broken.items():
+        try:
+            nlp_patterns.validate_rule_definition(definition)
+        except Exception as error:
+            print(termcolor.colored("PASS", "green"), case, "|", error)
+        else:
+            print(termcolor.colored("FAIL", "red"), case, "was accepted")
+
+    try:
+        nlp_patterns.RuleRegistry.from_definitions([valid, {**valid, "name": "copy"}])
+    except Exception as error:
+        print(termcolor.colored("PASS", "green"), "same priority |", error)
+    else:
+        print(termcolor.colored("FAIL", "red"), "same priority was accepted")
+    print()
+
+
 def semantic_comparison(prediction: uml.UML, original: uml.UML):
     def compare_classes_no_type(prediction: uml.UMLClass, ground: uml.UMLClass):
 
@@ -404,8 +371,15 @@ def semantic_comparison(prediction: uml.UML, original: uml.UML):
 
 
 if __name__ == "__main__":
+    if PROFILE:
+        trace.start_profiling()
+
+    unit_rule_definitions()
     unit_parsing()
 
     print(termcolor.colored("SEMANTIC EVALUATION", "yellow"))
     test_semantics()
+    parse.print_rule_report()
 
+    if PROFILE:
+        trace.stop_profiling(os.path.join(TEMP_FOLDER, "profile"))
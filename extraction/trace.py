@@ -0,0 +1,180 @@
+"""
+Timing of the translation pipeline stages
+
+Stages are timed with
+
+    with trace.span("coref"):
+        ...
+
+When no tracer is enabled, span returns a shared object that does nothing, so the
+instrumentation can stay in the hot path. Traces are written as JSON lines, one span
+per line, or in the Chrome trace format (chrome://tracing, Perfetto).
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+
+from . import pipelines
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exception):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, sample_memory: bool = False) -> None:
+        # name, start ns, end ns, thread id, args
+        self.events: list[tuple] = []
+        self._lock = threading.Lock()
+
+        # name, highest resident memory in bytes seen at the end of its spans
+        self.sample_memory = sample_memory
+        self.peak_memory: dict[str, int] = {}
+
+    def span(self, name: str, **args):
+        return _Span(self, name, args)
+
+    def record(self, name: str, start: int, end: int, args: dict):
+        memory = pipelines.resident_memory() if self.sample_memory else 0
+        with self._lock:
+            self.events.append((name, start, end, threading.get_ident(), args))
+            if memory > self.peak_memory.get(name, 0):
+                self.peak_memory[name] = memory
+
+    def summary(self) -> dict:
+        """
+        Count and total milliseconds of each span name
+        """
+        totals: dict[str, dict] = {}
+        for name, start, end, _, _ in self.events:
+            total = totals.setdefault(name, {"count": 0, "total ms": 0.0})
+            total["count"] += 1
+            total["total ms"] += (end - start) / 1e6
+        return totals
+
+    def write_jsonl(self, path: str):
+        with open(path, "w") as out:
+            for name, start, end, thread, args in self.events:
+                event = {
+                    "name": name,
+                    "start ms": start / 1e6,
+                    "duration ms": (end - start) / 1e6,
+                    "thread": thread,
+                    "args": args,
+                }
+                print(json.dumps(event, default=str), file=out)
+
+    def write_chrome(self, path: str):
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1e3,
+                "dur": (end - start) / 1e3,
+                "pid": pid,
+                "tid": thread,
+                "args": args,
+            }
+            for name, start, end, thread, args in self.events
+        ]
+        with open(path, "w") as out:
+            json.dump({"traceEvents": events}, out, default=str)
+
+
+# the enabled tracer, if any
+_tracer: Tracer = None
+
+
+def span(name: str, **args):
+    if _tracer is None:
+        return NULL_SPAN
+    return _tracer.span(name, **args)
+
+
+def enable(sample_memory: bool = False) -> Tracer:
+    global _tracer
+    _tracer = Tracer(sample_memory)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def active() -> Tracer:
+    return _tracer
+
+
+# ------------------------------------------
+# --profile mode of the scripts
+
+_profiler: cProfile.Profile = None
+
+
+def start_profiling():
+    """
+    Enable the tracer and cProfile. Stages are also easy to spot with py-spy since
+    each one is a function of its own.
+    """
+    global _profiler
+    enable()
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_profiling(directory: str):
+    """
+    Writes trace.json (Chrome), trace.jsonl and profile.pstats to the directory and
+    prints the time spent in each stage
+    """
+    global _profiler
+    _profiler.disable()
+    tracer = active()
+    disable()
+
+    os.makedirs(directory, exist_ok=True)
+    _profiler.dump_stats(os.path.join(directory, "profile.pstats"))
+    _profiler = None
+    tracer.write_chrome(os.path.join(directory, "trace.json"))
+    tracer.write_jsonl(os.path.join(directory, "trace.jsonl"))
+
+    for name, total in sorted(
+        tracer.summary().items(), key=lambda item: -item[1]["total ms"]
+    ):
+        print(
+            "{:<12}{:>8} calls{:>12.1f} ms".format(
+                name, total["count"], total["total ms"]
+            ),
+            file=sys.stderr,
+        )
+    print("Profile saved to {}".format(directory), file=sys.stderr)
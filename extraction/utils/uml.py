@@ -5,6 +5,8 @@
 # Simple associations between classes including multiplicity and names
 
 from io import TextIOWrapper
+import io
+import json
 import os
 from typing import List, Tuple
 import networkx
@@ -120,6 +122,47 @@ class UML:
 
         return self
 
+    def to_plantuml(self) -> str:
+        buffer = io.StringIO()
+        self._to_plantuml(buffer)
+        return buffer.getvalue()
+
+    def save_json(self, path: str):
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file_object:
+            json.dump(self.to_json(), file_object, indent=2)
+
+    def to_json(self) -> dict:
+        """
+        Same layout as the plantuml-parser fragments read by inquire.get_json_uml_fragment
+        """
+        classes = []
+        relations = []
+        for uml_class in self.classes:
+            classes.append(
+                {
+                    "name": uml_class.name,
+                    "members": [
+                        {"name": name, "type": attribute_type}
+                        for name, attribute_type in uml_class.attributes
+                    ],
+                }
+            )
+            for destination, multiplicity, name in uml_class.associations:
+                relations.append(
+                    {
+                        "left": uml_class.name,
+                        "right": destination.name,
+                        "leftCardinality": " ".join(
+                            part for part in (name, multiplicity) if part != ""
+                        ),
+                    }
+                )
+
+        # the package name is sometimes the first class
+        return {"name": str(self.package_name), "elements": classes + relations}
+
     # https://plantuml.com/class-diagram
     def _to_plantuml(self, file_object):
 
@@ -3,4 +3,4 @@
 # Preprocess the data for further use
 ./prepare_classifier.sh .. data/
 python group.py ..
-python extraction/preprocess.py data/fragment_kinds.csv data/split.csv
\ No newline at end of file
+python -m extraction.preprocess data/fragment_kinds.csv data/split.csv
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""
+Translation server that keeps the models warm
+
+Loading coreferee (and tensorflow), both spaCy pipelines and the classifier takes seconds,
+while translating a sentence takes milliseconds. The server loads everything once and
+answers translation requests over HTTP on a local port or a Unix socket.
+
+Endpoints
+- GET /health: the process is up
+- GET /ready: the models are loaded, 503 until then, or with the error if they failed to
+- POST /translate: {"text": ..., "format": "plantuml" | "json", "document": id}
+- POST /rules/reload: load extraction/rules.json again, without a restart
+
+With a document id, the server keeps the sentences of the last version of that document
+and only translates again the sentences around the edits.
+
+See client.py for the command line client.
+"""
+
+import sys
+
+USAGE = "Usage: python server.py [--host 127.0.0.1] [--port 8765] [--socket path]"
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+
+    def pop_option(flag: str, default):
+        if flag not in ARGS:
+            return default
+        position = ARGS.index(flag)
+        value = ARGS[position + 1]
+        del ARGS[position : position + 2]
+        return value
+
+    HOST = pop_option("--host", "127.0.0.1")
+    PORT = int(pop_option("--port", 8765))
+    SOCKET_PATH = pop_option("--socket", None)
+
+    if len(ARGS) != 0:
+        print(USAGE, file=sys.stderr)
+        exit(1)
+
+import json
+import os
+import socketserver
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from extraction import parse, pipelines
+from extraction.incremental import IncrementalDocument
+
+# set once the models are warm
+READY = threading.Event()
+TRANSLATOR = None
+# why the models failed to load, if they did
+LOAD_ERROR = None
+
+# document id, (lock, incremental document), least recently used first. Translations
+# are stateless, but the edits of one document are applied one at a time.
+DOCUMENTS: OrderedDict[str, tuple] = OrderedDict()
+DOCUMENTS_LOCK = threading.Lock()
+MAX_DOCUMENTS = 256
+
+
+def load_models():
+    """
+    Load every model and run one translation so nothing is left to load lazily
+    """
+    global TRANSLATOR, LOAD_ERROR
+
+    try:
+        from translate import Translator
+
+        translator = Translator()
+        translator.warm_up()
+    except Exception as exception:
+        traceback.print_exc()
+        LOAD_ERROR = repr(exception)
+        print("Models failed to load, the server cannot translate", file=sys.stderr)
+        return
+
+    TRANSLATOR = translator
+    READY.set()
+
+    print("Models are warm", file=sys.stderr)
+    pipelines.print_report()
+
+
+def translate_document(document_id: str, text: str):
+    """
+    Incremental translation of a new version of the document
+    """
+    with DOCUMENTS_LOCK:
+        if document_id in DOCUMENTS:
+            DOCUMENTS.move_to_end(document_id)
+        else:
+            DOCUMENTS[document_id] = (
+                threading.Lock(),
+                IncrementalDocument(TRANSLATOR),
+            )
+            if len(DOCUMENTS) > MAX_DOCUMENTS:
+                DOCUMENTS.popitem(last=False)
+        lock, document = DOCUMENTS[document_id]
+
+    with lock:
+        return document.update(text)
+
+
+def reload_rules() -> dict:
+    """
+    Swap in the rules of the rule files. The documents are forgotten if the rules
+    changed, since their fragments come from the old ones.
+    """
+    summary = parse.reload_rules()
+    if summary["changed"]:
+        with DOCUMENTS_LOCK:
+            DOCUMENTS.clear()
+    return summary
+
+
+class TranslationHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/ready":
+            if READY.is_set():
+                self.send_json(200, {"status": "ready"})
+            elif LOAD_ERROR is not None:
+                self.send_json(503, {"status": "failed", "error": LOAD_ERROR})
+            else:
+                self.send_json(503, {"status": "loading"})
+        else:
+            self.send_json(404, {"error": "Unknown path: {}".format(self.path)})
+
+    def do_POST(self):
+        if self.path == "/rules/reload":
+            try:
+                self.send_json(200, reload_rules())
+            except Exception as exception:
+                # the old rules are still in use
+                self.send_json(400, {"error": str(exception)})
+            return
+
+        if self.path != "/translate":
+            self.send_json(404, {"error": "Unknown path: {}".format(self.path)})
+            return
+
+        if LOAD_ERROR is not None:
+            self.send_json(
+                503, {"error": "Models failed to load: {}".format(LOAD_ERROR)}
+            )
+            return
+
+        if not READY.is_set():
+            self.send_json(503, {"error": "Models are still loading"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            text = request["text"]
+            output_format = request.get("format", "plantuml")
+            document_id = request.get("document")
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"error": 'Expected a JSON body with a "text"'})
+            return
+
+        if output_format not in ["plantuml", "json"]:
+            self.send_json(400, {"error": "Unknown format: {}".format(output_format)})
+            return
+
+        try:
+            if document_id is None:
+                model = TRANSLATOR.translate(text)
+            else:
+                model = translate_document(str(document_id), text)
+        except Exception as exception:
+            traceback.print_exc()
+            self.send_json(500, {"error": repr(exception)})
+            return
+
+        if output_format == "json":
+            self.send_json(200, model.to_json())
+        else:
+            self.send_text(200, model.to_plantuml())
+
+    def send_json(self, status: int, body: dict):
+        self.send_text(status, json.dumps(body), "application/json")
+
+    def send_text(self, status: int, body: str, content_type="text/plain"):
+        encoded = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def address_string(self):
+        # unix sockets have no client address
+        if isinstance(self.client_address, tuple) and len(self.client_address) > 0:
+            return str(self.client_address[0])
+        return "unix"
+
+
+class ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        # BaseHTTPRequestHandler expects these
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, socket_path: str = None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, TranslationHandler)
+        print("Listening on {}".format(socket_path), file=sys.stderr)
+    else:
+        server = ThreadingHTTPServer((host, port), TranslationHandler)
+        print("Listening on http://{}:{}".format(host, port), file=sys.stderr)
+
+    # answer /health while the models load
+    threading.Thread(target=load_models, daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    serve(HOST, PORT, SOCKET_PATH)
@@ -3,11 +3,14 @@ Tests the entire pipeline using metrics
 """
 from classification.predict_kind import LazyLoadedClassifier
 from extraction.preprocess import resolve_coref
-from extraction.parse import LazyLoadedExtractor
+from extraction.parse import extract_many, print_rule_report
 from extraction.assemble import assemble, remove_duplicates
 from extraction.utils import uml, metrics, inquire
+from extraction import pipelines, trace
 
+import itertools
 import os
+import sys
 import pandas
 
 
@@ -31,49 +34,65 @@ def setup():
     os.makedirs(LOG_DIR, exist_ok=True)
 
 
-def make_predictions():
+def make_predictions(batch_size: int = 64, n_process: int = 1):
     """
     Run the pipeline. Returns the predictions.
+
+    The sentences of every model are extracted together, see extract_many.
     """
 
     classifier = LazyLoadedClassifier()
-    class_extractor = LazyLoadedExtractor("", "class")
-    rel_extractor = LazyLoadedExtractor("", "rel")
 
-    predictions: dict[str, uml.UML] = {}
+    # model name, sentences, kinds
+    classified: list[tuple[str, list[str], list[str]]] = []
 
     # Read the data
     for _, row in GROUPED.iterrows():
         model_name = row["model"]
         grouped_text = row["text"]
 
-        # preprocess each data point
-        preprocessed_text = resolve_coref(grouped_text)
+        with trace.span("document", document=model_name):
+            sentences, kinds = classify_model(grouped_text, classifier)
+        classified.append((model_name, sentences, kinds))
 
-        # classify each sentence
-        classification_results = {}
-        extraction_results = []
-        for index, sentence in preprocessed_text.items():
-            predicted_kind = classifier.predict(sentence)
-            classification_results[index] = predicted_kind
+    fragments = extract_many(
+        [sentence for _, sentences, _ in classified for sentence in sentences],
+        [kind for _, _, kinds in classified for kind in kinds],
+        batch_size=batch_size,
+        n_process=n_process,
+    )
 
-            if predicted_kind == "class":
-                class_extractor.extractor.set_sentence(sentence)
-                result = class_extractor.handle_class()
-            elif predicted_kind == "rel":
-                rel_extractor.extractor.set_sentence(sentence)
-                result = rel_extractor.handle_rel()
-            else:
-                raise Exception("Unexpected kind!")
+    predictions: dict[str, uml.UML] = {}
+    for model_name, sentences, _ in classified:
+        # the fragments are extracted as they are taken, so the extract spans of the
+        # model land in its document span
+        with trace.span("document", document=model_name):
+            extraction_results = list(itertools.islice(fragments, len(sentences)))
 
-            extraction_results.append(result)
+            # assemble the fragments
+            with trace.span("assemble", fragments=len(extraction_results)):
+                predictions[model_name] = assemble(extraction_results)
 
-        # assemble the fragments
-        assembly_result = assemble(extraction_results)
+    return predictions
 
-        predictions[model_name] = assembly_result
 
-    return predictions
+def classify_model(grouped_text: str, classifier: LazyLoadedClassifier):
+    """
+    Sentences of a model after coref, with their predicted kind
+    """
+    # preprocess each data point
+    with trace.span("coref"):
+        preprocessed_text = resolve_coref(grouped_text)
+
+    # classify the sentences together
+    sentences = list(preprocessed_text.values())
+    with trace.span("classify", sentences=len(sentences)):
+        kinds = classifier.predict_many(sentences)
+    for predicted_kind in kinds:
+        if predicted_kind not in ["class", "rel"]:
+            raise Exception("Unexpected kind!")
+
+    return sentences, kinds
 
 
 def evaluate(predictions: dict[str, uml.UML]):
@@ -131,6 +150,10 @@ def run_tests():
         [sum(y) / len(y) for y in zip(*rel_scores)]
     )
     log_message += "\n(Precision, Recall, f1)"
+    for stats in pipelines.report():
+        log_message += "\nPipeline {}\t{:.2f} s\t{:+.1f} MB".format(
+            stats["pipeline"], stats["load seconds"], stats["rss delta MB"]
+        )
 
     print(log_message)
     with open(os.path.join(LOG_DIR, "last_run.log"), "w") as out:
@@ -138,6 +161,15 @@ def run_tests():
 
 
 if __name__ == "__main__":
+    # python test_all.py [--profile]
+    PROFILE = "--profile" in sys.argv
+    if PROFILE:
+        trace.start_profiling()
+
     run_tests()
+    print_rule_report()
+
+    if PROFILE:
+        trace.stop_profiling(os.path.join(LOG_DIR, "profile"))
 
     # selective_test()
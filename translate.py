@@ -14,14 +14,51 @@ Procedure
 4. Assemble the UML model
   a. Combine all the UML objects back into one larger UML
 
+In batch mode, a JSONL or CSV file of {id, text} records is translated in one process.
+The texts go through spaCy in batches and each model is saved under its id.
 """
 
 import sys
 from extraction.assemble import assemble
 
+USAGE = """Usage: python translate.py text [--fresh] [--incremental state.pickle]
+       python translate.py --batch records.jsonl|records.csv out-dir [--batch-size n] [--workers n] [--chunk-size n] [--fresh]
+       add --combined to either to match the class and rel rules before classifying
+       add --cache path [--cache-size megabytes] to either to reuse earlier results
+       add --profile to either to save a trace and a cProfile of the run"""
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2 and len(sys.argv) != 3:
-        print("Usage: python translate.py text [--fresh]")
+    ARGS = sys.argv[1:]
+
+    def pop_option(flag: str, default):
+        if flag not in ARGS:
+            return default
+        position = ARGS.index(flag)
+        value = ARGS[position + 1]
+        del ARGS[position : position + 2]
+        return value
+
+    USE_FRESH_START = "--fresh" in ARGS
+    if USE_FRESH_START:
+        ARGS.remove("--fresh")
+    PROFILE = "--profile" in ARGS
+    if PROFILE:
+        ARGS.remove("--profile")
+    COMBINED = "--combined" in ARGS
+    if COMBINED:
+        ARGS.remove("--combined")
+    BATCH_MODE = "--batch" in ARGS
+    if BATCH_MODE:
+        ARGS.remove("--batch")
+    BATCH_SIZE = int(pop_option("--batch-size", 64))
+    WORKERS = int(pop_option("--workers", 1))
+    CHUNK_SIZE = int(pop_option("--chunk-size", 16))
+    CACHE_PATH = pop_option("--cache", None)
+    CACHE_MEGABYTES = int(pop_option("--cache-size", 512))
+    INCREMENTAL_PATH = pop_option("--incremental", None)
+
+    if (BATCH_MODE and len(ARGS) != 2) or (not BATCH_MODE and len(ARGS) != 1):
+        print(USAGE)
         print(
             """
             This assumes that you have the Heroku training data in the parent directory.
@@ -29,18 +66,55 @@ if __name__ == "__main__":
             """
         )
         print("text: The text you want to be turned into UML.")
+        print(
+            "--batch: Translate every record of a JSONL or CSV file with id and text."
+        )
+        print("--batch-size: Number of texts given to spaCy at once. Default 64.")
+        print("--workers: Number of processes translating the batch. Default 1.")
+        print("--chunk-size: Number of texts sent to a worker at once. Default 16.")
+        print("--cache: SQLite file caching the result of every stage.")
+        print("--cache-size: Maximum size of the cache in megabytes. Default 512.")
+        print(
+            "--incremental: File keeping the sentences and fragments of the last run. Only the sentences around an edit are translated again."
+        )
+        print(
+            "--profile: Save the time of every stage (trace.json for chrome://tracing, trace.jsonl) and profile.pstats to profile/, or to out-dir/profile in batch mode. Only the main process is traced."
+        )
+        print(
+            "--combined: Match the rules of both kinds on every sentence. The classifier only decides when both build a fragment."
+        )
         print(
             "--fresh: Whether to execute the whole pipeline again. Optimizations make the program execute partially."
         )
         exit(1)
-    TEXT = sys.argv[1]
-    USE_FRESH_START = True if "--fresh" in sys.argv else False
 
 import subprocess
 import os
-from extraction.preprocess import resolve_coref
+import csv
+import gc
+import itertools
+import json
+import multiprocessing
+import pickle
+import re
+import time
+import traceback
+from extraction.preprocess import (
+    resolve_coref,
+    resolve_coref_many,
+    parse_sentences,
+)
 from classification.predict_kind import LazyLoadedClassifier
-from extraction.parse import LazyLoadedExtractor
+from extraction.parse import (
+    extract,
+    extract_combined,
+    extract_many,
+    print_rule_report,
+)
+from extraction.utils import uml
+from extraction.cache import StageCache, version_fingerprint
+from extraction.incremental import IncrementalDocument
+from extraction import pipelines, trace
 
 
 def prepare_classifier():
@@ -55,43 +129,694 @@ def preprocess(text: str):
     return resolve_coref(text)
 
 
+# The parse of a sentence within its document and of its text alone can give different
+# fragments, so the fragments are cached with the source of their parse
+def parse_source(span) -> str:
+    return "text" if span is None else "document"
+
+
+# Stands for the span of a sentence parsed within its document, when the coref comes
+# from the cache. The fragment of the sentence was cached, see Translator.resolve_many
+CACHED_SPAN = object()
+
+
+def fragment_parts(sentence: tuple) -> tuple:
+    """
+    The cache key of the fragment of a (processed text, parsed span) pair, after its kind
+    """
+    text, span = sentence
+    return parse_source(span), text
+
+
+def parseable(sentence: tuple) -> tuple:
+    """
+    The (processed text, parsed span) pair for parse_sentences. A sentence whose span is
+    not at hand is parsed alone.
+    """
+    text, span = sentence
+    return (text, None) if span is CACHED_SPAN else sentence
+
+
+class TranslationFailure:
+    """
+    In place of the result of a text whose translation raised, see
+    Translator.translate_many with keep_going
+    """
+
+    def __init__(self, error: Exception) -> None:
+        self.error = "{}: {}".format(type(error).__name__, error)
+        self.traceback = traceback.format_exc()
+
+
+class Translator:
+    """
+    Keeps the classifier loaded between translations. Extraction is stateless, so one
+    translator can serve many threads.
+
+    With a StageCache, the coref output, the kind and fragment of each sentence and the
+    assembled model are looked up before being computed.
+
+    In combined mode, the rules of both kinds are matched on every sentence and the
+    classifier is only asked when both build a fragment, see parse.extract_combined.
+    """
+
+    def __init__(self, cache: StageCache = None, combined: bool = False) -> None:
+        self.classifier = LazyLoadedClassifier()
+        self.cache = cache
+        self.combined = combined
+
+    def cached(self, stage: str, compute, *parts: str):
+        if self.cache is None:
+            return compute()
+        return self.cache.cached(stage, compute, *parts)
+
+    def extract(self, kind: str, doc):
+        """
+        Extract the fragment of a sentence parsed by the extraction pipeline
+        """
+        if kind not in ["class", "rel"]:
+            raise Exception("Unexpected kind!")
+        return extract(doc, kind)
+
+    def classify(self, text: str) -> str:
+        with trace.span("classify", sentences=1):
+            return self.cached("kind", lambda: self.classifier.predict(text), text)
+
+    def classify_many(self, texts: list[str]) -> list[str]:
+        """
+        Kinds of the texts, the ones not cached predicted together
+        """
+        kinds = [None] * len(texts)
+        to_classify = []
+        for index, text in enumerate(texts):
+            if self.cache is not None:
+                found, kind = self.cache.get("kind", text)
+                if found:
+                    kinds[index] = kind
+                    continue
+            to_classify.append(index)
+
+        predicted = self.classifier.predict_many(
+            [texts[index] for index in to_classify]
+        )
+        for index, kind in zip(to_classify, predicted):
+            kinds[index] = kind
+        if self.cache is not None:
+            self.cache.put_many(
+                "kind", [(kinds[index], (texts[index],)) for index in to_classify]
+            )
+
+        return kinds
+
+    def model_parts(self, text: str) -> tuple:
+        """
+        Cache key of the model of a text, which depends on the mode
+        """
+        if self.combined:
+            return ("combined", text)
+        return (text,)
+
+    def warm_up(self):
+        """
+        Load every model now, instead of lazily during the first translation
+        """
+        pipelines.get("coref")
+        pipelines.get("extraction")
+        self.classifier.load()
+        self.extract("class", pipelines.get("extraction")("A school has a name."))
+        self.extract("rel", pipelines.get("extraction")("A school has a name."))
+
+    def translate(self, text: str) -> uml.UML:
+        with trace.span("translate", texts=1):
+            model, _ = self.cached(
+                "model", lambda: self._translate(text), *self.model_parts(text)
+            )
+        return model
+
+    def _translate(self, text: str):
+        sentences = self.resolve_many([text])[0]
+        return self.translate_sentences(sentences), len(sentences)
+
+    def resolve_many(self, texts: list[str], batch_size: int = 64) -> list[dict]:
+        """
+        Coref of each text. Returns sentence id, (processed text, parsed span) per text.
+
+        The spans are not cached. The cached coref is only used when the fragments of
+        the sentences parsed within the document are cached too, they have CACHED_SPAN
+        instead. The other sentences were parsed alone, and have None.
+        """
+        resolved = [None] * len(texts)
+        to_resolve = []
+        for index, text in enumerate(texts):
+            if self.cache is not None:
+                found, sentences = self.cache.get("coref", text)
+                if found and self.document_fragments_cached(sentences):
+                    resolved[index] = {
+                        sent_id: (sentence, CACHED_SPAN if in_document else None)
+                        for sent_id, (sentence, in_document) in sentences.items()
+                    }
+                    continue
+            to_resolve.append(index)
+
+        with trace.span("coref", texts=len(to_resolve)):
+            parsed = resolve_coref_many(
+                [texts[index] for index in to_resolve],
+                batch_size=batch_size,
+                keep_spans=True,
+            )
+        for index, sentences in zip(to_resolve, parsed):
+            resolved[index] = sentences
+        if self.cache is not None:
+            self.cache.put_many(
+                "coref",
+                [
+                    (
+                        {
+                            sent_id: (text, span is not None)
+                            for sent_id, (text, span) in resolved[index].items()
+                        },
+                        (texts[index],),
+                    )
+                    for index in to_resolve
+                ],
+            )
+
+        return resolved
+
+    def document_fragments_cached(self, sentences: dict[int, tuple]) -> bool:
+        """
+        Whether the fragments of the cached coref sentences parsed within their document
+        are cached
+        """
+        for sentence, in_document in sentences.values():
+            if not in_document:
+                continue
+            kind = "combined"
+            if not self.combined:
+                found, kind = self.cache.peek("kind", sentence)
+                if not found:
+                    return False
+            found, _ = self.cache.peek(
+                "fragment", kind, parse_source(CACHED_SPAN), sentence
+            )
+            if not found:
+                return False
+        return True
+
+    def translate_sentences(self, sentences: dict[int, tuple]) -> uml.UML:
+        fragments = self.extract_sentences(list(sentences.values()))
+
+        # assembly
+        with trace.span("assemble", fragments=len(fragments)):
+            return assemble([f for f in fragments if f is not None])
+
+    def extract_sentences(self, sentences: list[tuple], batch_size: int = 64) -> list:
+        """
+        Classify and extract (processed text, parsed span) pairs. Returns the fragments
+        in the same order, None where no rule matched.
+        """
+        if self.combined:
+            return self.extract_sentences_combined(sentences, batch_size)
+
+        # predictions
+        with trace.span("classify", sentences=len(sentences)):
+            kinds = self.classify_many([text for text, _ in sentences])
+
+        fragments = [None] * len(sentences)
+        to_extract = []
+        for index, (kind, (text, span)) in enumerate(zip(kinds, sentences)):
+            if self.cache is not None:
+                found, fragment = self.cache.get(
+                    "fragment", kind, parse_source(span), text
+                )
+                if found:
+                    fragments[index] = fragment
+                    continue
+            to_extract.append(index)
+
+        # extraction, reusing the parse of the coref pipeline
+        with trace.span("parse", sentences=len(to_extract)):
+            docs = list(
+                parse_sentences(
+                    [parseable(sentences[index]) for index in to_extract],
+                    batch_size=batch_size,
+                )
+            )
+        extracted = extract_many(
+            docs, [kinds[index] for index in to_extract], batch_size=batch_size
+        )
+        for index, fragment in zip(to_extract, extracted):
+            fragments[index] = fragment
+        if self.cache is not None:
+            self.cache.put_many(
+                "fragment",
+                [
+                    (
+                        fragments[index],
+                        (kinds[index], *fragment_parts(sentences[index])),
+                    )
+                    for index in to_extract
+                    if sentences[index][1] is not CACHED_SPAN
+                ],
+            )
+
+        return fragments
+
+    def extract_sentences_combined(
+        self, sentences: list[tuple], batch_size: int = 64
+    ) -> list:
+        """
+        extract_sentences in combined mode
+        """
+        fragments = [None] * len(sentences)
+        to_extract = []
+        for index, (text, span) in enumerate(sentences):
+            if self.cache is not None:
+                found, fragment = self.cache.get(
+                    "fragment", "combined", parse_source(span), text
+                )
+                if found:
+                    fragments[index] = fragment
+                    continue
+            to_extract.append(index)
+
+        with trace.span("parse", sentences=len(to_extract)):
+            docs = list(
+                parse_sentences(
+                    [parseable(sentences[index]) for index in to_extract],
+                    batch_size=batch_size,
+                )
+            )
+        for index, doc in zip(to_extract, docs):
+            with trace.span("extract", kind="combined"):
+                _, fragments[index] = extract_combined(doc, self.classify)
+        if self.cache is not None:
+            self.cache.put_many(
+                "fragment",
+                [
+                    (fragments[index], ("combined", *fragment_parts(sentences[index])))
+                    for index in to_extract
+                    if sentences[index][1] is not CACHED_SPAN
+                ],
+            )
+
+        return fragments
+
+    def translate_many(self, texts, batch_size: int = 64, keep_going: bool = False):
+        """
+        Translate many texts, batch_size texts at a time.
+
+        Yields the assembled model and the number of sentences of each text, in order.
+        With keep_going, a text whose translation raises yields a TranslationFailure
+        instead of stopping the others.
+        """
+        texts = iter(texts)
+
+        while True:
+            chunk = list(itertools.islice(texts, batch_size))
+            if len(chunk) == 0:
+                return
+
+            with trace.span("translate", texts=len(chunk)):
+                if keep_going:
+                    results = self._translate_chunk_apart(chunk, batch_size)
+                else:
+                    results = self._translate_chunk(chunk, batch_size)
+            yield from results
+
+    def _translate_chunk_apart(self, chunk: list[str], batch_size: int) -> list:
+        """
+        _translate_chunk, or each text on its own if the chunk fails
+        """
+        try:
+            return self._translate_chunk(chunk, batch_size)
+        except Exception as error:
+            if len(chunk) == 1:
+                return [TranslationFailure(error)]
+
+        results = []
+        for text in chunk:
+            try:
+                results.extend(self._translate_chunk([text], batch_size))
+            except Exception as error:
+                results.append(TranslationFailure(error))
+        return results
+
+    def _translate_chunk(self, chunk: list[str], batch_size: int) -> list:
+        """
+        Translate the texts of one batch, see translate_many
+        """
+        results = [None] * len(chunk)
+        to_translate = []
+        for index, text in enumerate(chunk):
+            if self.cache is not None:
+                found, result = self.cache.get("model", *self.model_parts(text))
+                if found:
+                    results[index] = result
+                    continue
+            to_translate.append(index)
+
+        resolved = self.resolve_many(
+            [chunk[index] for index in to_translate], batch_size=batch_size
+        )
+
+        # the sentences of the whole chunk are extracted together
+        sentences = [
+            sentence for sentences in resolved for sentence in sentences.values()
+        ]
+        fragments = self.extract_sentences(sentences, batch_size=batch_size)
+
+        start = 0
+        for index, text_sentences in zip(to_translate, resolved):
+            end = start + len(text_sentences)
+            extracted_umls = [f for f in fragments[start:end] if f is not None]
+            with trace.span("assemble", fragments=len(extracted_umls)):
+                results[index] = (assemble(extracted_umls), len(text_sentences))
+            start = end
+        if self.cache is not None:
+            self.cache.put_many(
+                "model",
+                [
+                    (results[index], self.model_parts(chunk[index]))
+                    for index in to_translate
+                ],
+            )
+
+        return results
+
+
+# the ids of the records name their output files
+RECORD_ID = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]*")
+
+
+def check_record_ids(records: list):
+    """
+    Every id must be a plain file name, other than the summary, and unique
+    """
+    seen = set()
+    for record_id, _ in records:
+        if record_id == "summary":
+            raise Exception(
+                "Record id is taken by summary.json: {!r}".format(record_id)
+            )
+        if RECORD_ID.fullmatch(record_id) is None:
+            raise Exception(
+                "Record id must be a plain file name of letters, digits, '_', '-' and '.': {!r}".format(
+                    record_id
+                )
+            )
+        if record_id in seen:
+            raise Exception("Duplicate record id: {!r}".format(record_id))
+        seen.add(record_id)
+
+
+def read_records(path: str):
+    """
+    Reads the {id, text} records of a JSONL or CSV file
+    """
+    if path.endswith(".jsonl"):
+        with open(path, "r") as jsonl:
+            records = [json.loads(line) for line in jsonl if line.strip() != ""]
+    elif path.endswith(".csv"):
+        with open(path, "r", newline="") as csv_file:
+            records = list(csv.DictReader(csv_file))
+    else:
+        raise Exception("Records must be .jsonl or .csv: {}".format(path))
+
+    for record in records:
+        if "id" not in record or "text" not in record:
+            raise Exception("Record without id or text: {}".format(record))
+
+    records = [(str(record["id"]), record["text"]) for record in records]
+    check_record_ids(records)
+    return records
+
+
+def load_document(path: str, translator: Translator) -> IncrementalDocument:
+    """
+    The incremental document saved by the last run, or a new one if there is none or
+    the code or models changed since
+    """
+    if os.path.exists(path):
+        with open(path, "rb") as state:
+            fingerprint, document = pickle.load(state)
+        if fingerprint == version_fingerprint():
+            document.translator = translator
+            return document
+    return IncrementalDocument(translator)
+
+
+def save_document(path: str, document: IncrementalDocument):
+    with open(path, "wb") as state:
+        pickle.dump((version_fingerprint(), document), state)
+
+
+# Set in the parent before the workers are forked. The workers inherit the loaded
+# models and share their memory pages copy-on-write.
+_WORKER_TRANSLATOR: Translator = None
+_WORKER_BATCH_SIZE = 64
+
+
+def _start_spawned_worker(
+    batch_size: int, cache_path: str, cache_bytes: int, combined: bool
+):
+    # without fork, every worker loads its own copy of the models
+    global _WORKER_TRANSLATOR, _WORKER_BATCH_SIZE
+    cache = None if cache_path is None else StageCache(cache_path, cache_bytes)
+    _WORKER_TRANSLATOR = Translator(cache, combined)
+    _WORKER_TRANSLATOR.warm_up()
+    _WORKER_BATCH_SIZE = batch_size
+
+
+def _translate_chunk(task: tuple):
+    texts, keep_going = task
+    results = list(
+        _WORKER_TRANSLATOR.translate_many(
+            texts, batch_size=_WORKER_BATCH_SIZE, keep_going=keep_going
+        )
+    )
+
+    # the parent only sees its own cache counters
+    counters = None
+    if _WORKER_TRANSLATOR.cache is not None:
+        counters = _WORKER_TRANSLATOR.cache.take_counters()
+
+    return results, counters
+
+
+def translate_parallel(
+    translator: Translator,
+    texts: list[str],
+    workers: int,
+    chunk_size: int = 16,
+    batch_size: int = 64,
+    keep_going: bool = False,
+):
+    """
+    Translate the texts in a pool of processes, chunk_size texts per task.
+
+    Yields the assembled model and the number of sentences of each text, in order, see
+    Translator.translate_many for keep_going.
+    """
+    global _WORKER_TRANSLATOR, _WORKER_BATCH_SIZE
+
+    chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        # load everything in the parent so the workers start warm
+        translator.warm_up()
+        _WORKER_TRANSLATOR = translator
+        _WORKER_BATCH_SIZE = batch_size
+
+        # keep the models out of the collector, otherwise its bookkeeping writes to
+        # every page of the models and the workers end up with private copies
+        gc.collect()
+        gc.freeze()
+
+        pool = multiprocessing.get_context("fork").Pool(workers)
+    else:
+        cache = translator.cache
+        pool = multiprocessing.get_context("spawn").Pool(
+            workers,
+            initializer=_start_spawned_worker,
+            initargs=(
+                batch_size,
+                None if cache is None else cache.path,
+                None if cache is None else cache.max_bytes,
+                translator.combined,
+            ),
+        )
+
+    try:
+        # imap keeps the order of the chunks
+        tasks = [(chunk, keep_going) for chunk in chunks]
+        for results, counters in pool.imap(_translate_chunk, tasks):
+            if counters is not None:
+                translator.cache.merge_counters(counters)
+            yield from results
+    finally:
+        pool.close()
+        pool.join()
+        gc.unfreeze()
+
+
+def translate_batch(
+    translator: Translator,
+    records: list,
+    out_dir: str,
+    batch_size: int = 64,
+    workers: int = 1,
+    chunk_size: int = 16,
+):
+    """
+    Saves the PlantUML and JSON of every record under its id. Returns the throughput.
+
+    A record whose translation fails is logged and listed in the summary, the others
+    are still translated.
+    """
+    check_record_ids(records)
+    os.makedirs(out_dir, exist_ok=True)
+
+    documents = 0
+    sentences = 0
+    failures = []
+    start = time.perf_counter()
+
+    texts = [text for _, text in records]
+    if workers > 1:
+        results = translate_parallel(
+            translator,
+            texts,
+            workers,
+            chunk_size=chunk_size,
+            batch_size=batch_size,
+            keep_going=True,
+        )
+    else:
+        results = translator.translate_many(
+            texts, batch_size=batch_size, keep_going=True
+        )
+
+    for (record_id, _), result in zip(records, results):
+        if isinstance(result, TranslationFailure):
+            print(
+                "Record {} failed: {}\n{}".format(
+                    record_id, result.error, result.traceback
+                ),
+                file=sys.stderr,
+            )
+            failures.append({"id": record_id, "error": result.error})
+            continue
+
+        model, sentence_count = result
+        model.save(os.path.join(out_dir, record_id + ".plantuml"))
+        model.save_json(os.path.join(out_dir, record_id + ".json"))
+
+        documents += 1
+        sentences += sentence_count
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "documents": documents,
+        "sentences": sentences,
+        "workers": workers,
+        "seconds": seconds,
+        "documents/sec": documents / seconds if seconds > 0 else 0,
+        "sentences/sec": sentences / seconds if seconds > 0 else 0,
+        "failed": len(failures),
+        "failures": failures,
+    }
+    if translator.cache is not None:
+        summary["cache"] = translator.cache.stats()
+    with open(os.path.join(out_dir, "summary.json"), "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    return summary
+
+
 if __name__ == "__main__":
+    if BATCH_MODE:
+        # relative to where the script was called, before prepare_classifier moves us
+        RECORDS_PATH = os.path.abspath(ARGS[0])
+        OUT_DIR = os.path.abspath(ARGS[1])
+    if CACHE_PATH is not None:
+        CACHE_PATH = os.path.abspath(CACHE_PATH)
+    if INCREMENTAL_PATH is not None:
+        INCREMENTAL_PATH = os.path.abspath(INCREMENTAL_PATH)
+
     prepare_classifier()
 
-    # key: sentence index, item: processed text
-    sentences = preprocess(TEXT)
+    if PROFILE:
+        trace.start_profiling()
 
-    classifier = LazyLoadedClassifier()
+    cache = None
+    if CACHE_PATH is not None:
+        cache = StageCache(CACHE_PATH, max_bytes=CACHE_MEGABYTES * 2**20)
+    translator = Translator(cache, combined=COMBINED)
 
-    # predictions
-    predicted_kinds = {}
-    for sentence_id, sentence_text in sentences.items():
-        predicted_kinds[sentence_id] = classifier.predict(sentence_text)
+    if BATCH_MODE:
+        summary = translate_batch(
+            translator,
+            read_records(RECORDS_PATH),
+            OUT_DIR,
+            batch_size=BATCH_SIZE,
+            workers=WORKERS,
+            chunk_size=CHUNK_SIZE,
+        )
+        print(
+            "Translated {} documents ({} sentences) in {:.2f} s".format(
+                summary["documents"], summary["sentences"], summary["seconds"]
+            )
+        )
+        print(
+            "{:.2f} documents/sec, {:.2f} sentences/sec. Saved to {}".format(
+                summary["documents/sec"], summary["sentences/sec"], OUT_DIR
+            )
+        )
+        if summary["failed"] > 0:
+            print(
+                "{} records failed, see summary.json".format(summary["failed"]),
+                file=sys.stderr,
+            )
 
-    # extraction
-    extracted_umls = []
+    elif INCREMENTAL_PATH is not None:
+        document = load_document(INCREMENTAL_PATH, translator)
+        combined = document.update(ARGS[0])
+        save_document(INCREMENTAL_PATH, document)
 
-    class_extractor = LazyLoadedExtractor("", "class")
-    rel_extractor = LazyLoadedExtractor("", "rel")
-    for sentence_id, kind in predicted_kinds.items():
-        if kind == "class":
-            class_extractor.extractor.set_sentence(sentences[sentence_id])
-            result = class_extractor.handle_class()
-        elif kind == "rel":
-            rel_extractor.extractor.set_sentence(sentences[sentence_id])
-            result = rel_extractor.handle_rel()
-        else:
-            raise Exception("Unexpected kind!")
+        script_path = os.path.dirname(os.path.realpath(__file__))
+        combined.save(os.path.join(script_path, "out.plantuml"))
 
-        if result is not None:
-            extracted_umls.append(result)
+        print(combined, "Saved to {}".format(os.path.join(script_path, "out.plantuml")))
+        print(
+            "{} of {} sentences translated again".format(
+                document.last_update["extracted"], document.last_update["sentences"]
+            )
+        )
 
-    # assembly
-    # TODO
-    combined = assemble(extracted_umls)
+    else:
+        combined = translator.translate(ARGS[0])
 
-    script_path = os.path.dirname(os.path.realpath(__file__))
-    combined.save(os.path.join(script_path, "out.plantuml"))
+        script_path = os.path.dirname(os.path.realpath(__file__))
+        combined.save(os.path.join(script_path, "out.plantuml"))
 
-    print(combined, "Saved to {}".format(os.path.join(script_path, "out.plantuml")))
+        print(combined, "Saved to {}".format(os.path.join(script_path, "out.plantuml")))
 
+    if cache is not None:
+        for stage, counts in cache.stats()["stages"].items():
+            print(
+                "Cache {}: {} hits, {} misses".format(
+                    stage, counts["hits"], counts["misses"]
+                )
+            )
+        cache.close()
+
+    pipelines.print_report()
+
+    if PROFILE:
+        print_rule_report()
+        if BATCH_MODE:
+            trace.stop_profiling(os.path.join(OUT_DIR, "profile"))
+        else:
+            script_path = os.path.dirname(os.path.realpath(__file__))
+            trace.stop_profiling(os.path.join(script_path, "profile"))